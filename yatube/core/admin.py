@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from .models import OutboxMessage, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'duration',
+    )
+    search_fields = ('name',)
+    list_filter = ('status', 'name')
+    empty_value_display = '-пусто-'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'sent_at',
+    )
+    search_fields = ('recipients',)
+    list_filter = ('status',)
+    exclude = ('message',)
+    empty_value_display = '-пусто-'
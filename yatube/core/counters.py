@@ -0,0 +1,158 @@
+import logging
+from functools import wraps
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEY = 'counter:{name}:{kind}'
+# Сколько живут дельты, журнал и отметки окна. Сброс по interval
+# обновляет их гораздо чаще, так что истекают только ключи постов,
+# которые давно никто не трогал.
+COUNTER_KEY_TIMEOUT = 60 * 60 * 24
+
+
+class BufferedCounter:
+    """Счётчики, которые копятся в кэше и сбрасываются в БД пачкой.
+
+    add() меняет только кэш: дельта объекта увеличивается атомарным
+    incr, а id объекта попадает в журнал один раз за окно между
+    сбросами — ключи с номерами из общего счётчика. Так журнал растёт
+    с числом разных объектов, а не событий. flush() читает журнал
+    с прошлого сброса, забирает накопленные дельты и передаёт их
+    в apply одним вызовом, так что запись в БД идёт одной транзакцией
+    на всю пачку.
+
+    Сброс запускает команда flush_counters, а если заданы threshold
+    или interval — сам add(), когда с прошлого сброса набралось
+    threshold событий или прошло interval секунд. Тогда при потере
+    кэша пропадёт не больше этого объёма изменений. С LocMemCache
+    у каждого процесса свой кэш, и команда из отдельного процесса
+    его не видит, поэтому счётчикам нужен interval.
+    """
+
+    def __init__(self, name, apply, threshold=None, interval=None):
+        self.name = name
+        self.apply = apply
+        self.threshold = threshold
+        self.interval = interval
+        self.head_key = self._key('head')
+        self.tail_key = self._key('tail')
+        self.events_key = self._key('events')
+        self.lock_key = self._key('lock')
+        self.timer_key = self._key('timer')
+
+    def _key(self, kind):
+        return COUNTER_KEY.format(name=self.name, kind=kind)
+
+    def _delta_key(self, pk):
+        return self._key(f'delta:{pk}')
+
+    def _log_key(self, position):
+        return self._key(f'log:{position}')
+
+    def _logged_key(self, window, pk):
+        return self._key(f'logged:{window}:{pk}')
+
+    def _incr(self, key, delta=1, timeout=None):
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Ключ вытеснили между add и incr
+            cache.set(key, delta, timeout)
+            return delta
+
+    def add(self, pk, delta=1):
+        """Прибавляет delta к счётчику объекта."""
+        if self._flush_due(self._add(pk, delta)):
+            self.flush()
+
+    def _add(self, pk, delta):
+        """Копит дельту; возвращает число событий с прошлого сброса."""
+        self._incr(self._delta_key(pk), delta, COUNTER_KEY_TIMEOUT)
+        # Окно — позиция журнала, с которой начнёт следующий сброс.
+        # Дельта уже учтена, поэтому если сброс успел её забрать,
+        # мы видим новое окно и снова записываем объект в журнал.
+        window = cache.get(self.tail_key, 0)
+        logged_key = self._logged_key(window, pk)
+        if cache.add(logged_key, True, COUNTER_KEY_TIMEOUT):
+            position = self._incr(self.head_key)
+            cache.set(self._log_key(position), pk, COUNTER_KEY_TIMEOUT)
+        return self._incr(self.events_key)
+
+    def _flush_due(self, events):
+        if self.threshold and events >= self.threshold:
+            return True
+        # Ключ таймера живёт interval секунд: add удаётся раз в интервал
+        return bool(self.interval) and cache.add(
+            self.timer_key, True, self.interval
+        )
+
+    def get_pending(self, pks):
+        """Ещё не сброшенные в БД дельты объектов: {pk: delta}."""
+        keys = {self._delta_key(pk): pk for pk in pks}
+        return {
+            keys[key]: delta
+            for key, delta in cache.get_many(list(keys)).items() if delta
+        }
+
+    def flush(self):
+        """Сбрасывает накопленные дельты в БД; возвращает {pk: delta}.
+
+        Одновременно работает только один сброс. Дельты вычитаются
+        из кэша до записи в БД, поэтому при падении процесса между
+        этими шагами теряется не больше одной пачки, но ничего
+        не считается дважды.
+        """
+        if not cache.add(self.lock_key, True, 60):
+            return {}
+        try:
+            events = cache.get(self.events_key, 0)
+            if events:
+                cache.decr(self.events_key, events)
+            window = cache.get(self.tail_key, 0)
+            head = cache.get(self.head_key, 0)
+            if head == window:
+                return {}
+            # Меньше — значит, счётчик журнала вытеснили и начали заново
+            tail = window if head > window else 0
+            log_keys = [self._log_key(i) for i in range(tail + 1, head + 1)]
+            pks = set(cache.get_many(log_keys).values())
+            cache.set(self.tail_key, head, None)
+            cache.delete_many(
+                log_keys + [self._logged_key(window, pk) for pk in pks]
+            )
+
+            deltas = self.get_pending(pks)
+            for pk, delta in deltas.items():
+                cache.decr(self._delta_key(pk), delta)
+                cache.touch(self._delta_key(pk), COUNTER_KEY_TIMEOUT)
+            if not deltas:
+                return {}
+            try:
+                self.apply(deltas)
+            except Exception:
+                logger.exception('Не удалось сбросить счётчики %s', self.name)
+                for pk, delta in deltas.items():
+                    self._add(pk, delta)
+                return {}
+            return deltas
+        finally:
+            cache.delete(self.lock_key)
+
+
+def count_hits(counter, pk_kwarg):
+    """Декоратор view: каждый ответ 200 прибавляет 1 к счётчику объекта.
+
+    Ставится снаружи cache_shared_page, чтобы считались и ответы из кэша.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                counter.add(kwargs[pk_kwarg])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,51 @@
+import json
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENT_MARKER = '<!--fragment:{}-->'
+FRAGMENT_PATTERN = re.compile(r'<!--fragment:(.*?)-->')
+
+_fragments = {}
+
+
+def user_fragment(name, template_name):
+    """Регистрирует персональный фрагмент страницы.
+
+    Декорируемая функция получает request и параметры из шаблона и
+    возвращает контекст для template_name. В общий кэш страницы попадает
+    только метка фрагмента, а сам он рендерится для каждого запроса.
+    """
+    def decorator(get_context):
+        _fragments[name] = (template_name, get_context)
+        return get_context
+    return decorator
+
+
+def render_fragment(request, name, params):
+    template_name, get_context = _fragments[name]
+    return render_to_string(
+        template_name, get_context(request, **params), request=request
+    )
+
+
+def get_fragment_marker(name, params):
+    # Экранируем '>', чтобы данные не могли закрыть HTML-комментарий.
+    data = json.dumps({'name': name, 'params': params}).replace(
+        '>', '\\u003e'
+    )
+    return mark_safe(FRAGMENT_MARKER.format(data))
+
+
+def substitute_fragments(request, content):
+    """Подставляет в страницу фрагменты, отрендеренные для request."""
+    def render(match):
+        data = json.loads(match.group(1))
+        return render_fragment(request, data['name'], data['params'])
+    return FRAGMENT_PATTERN.sub(render, content)
+
+
+@user_fragment('header', 'includes/header.html')
+def header(request):
+    return {}
@@ -0,0 +1,142 @@
+import logging
+import pickle
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage, Task
+from .tasks import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Почтовый backend, который не отправляет письма, а сохраняет их.
+
+    Письма записываются в OutboxMessage в текущей транзакции, а
+    отправляет их задача deliver_outbox через OUTBOX_EMAIL_BACKEND.
+    Поэтому запрос не ждёт почтовый сервер, а письмо не уйдёт,
+    если транзакция запроса откатится.
+    """
+
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        with transaction.atomic():
+            OutboxMessage.objects.bulk_create([
+                OutboxMessage(
+                    subject=message.subject[:255],
+                    recipients=', '.join(message.recipients()),
+                    message=pickle.dumps(message),
+                    send_at=now,
+                ) for message in email_messages
+            ])
+            schedule_delivery()
+        return len(email_messages)
+
+
+def schedule_delivery(countdown=0):
+    """Ставит deliver_outbox в очередь, если она ещё не стоит там."""
+    scheduled = Task.objects.filter(
+        name=deliver_outbox.task_name, status=Task.QUEUED
+    ).exists()
+    if not scheduled:
+        enqueue(deliver_outbox.task_name, countdown=countdown)
+
+
+def claim_messages(limit):
+    """Захватывает до limit писем, которые пора отправить."""
+    now = timezone.now()
+    OutboxMessage.objects.filter(
+        status=OutboxMessage.SENDING,
+        claimed_at__lt=now - timezone.timedelta(
+            seconds=settings.TASK_LOCK_TIMEOUT
+        )
+    ).update(status=OutboxMessage.QUEUED)
+
+    candidates = list(
+        OutboxMessage.objects.filter(
+            status=OutboxMessage.QUEUED, send_at__lte=now
+        ).order_by('send_at', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    claimed = [
+        pk for pk in candidates
+        if OutboxMessage.objects.filter(
+            pk=pk, status=OutboxMessage.QUEUED
+        ).update(status=OutboxMessage.SENDING, claimed_at=now)
+    ]
+    return list(OutboxMessage.objects.filter(pk__in=claimed))
+
+
+def release_messages(outbox):
+    """Возвращает в очередь захваченные письма, которые не успели отправить."""
+    OutboxMessage.objects.filter(
+        pk__in=[item.pk for item in outbox], status=OutboxMessage.SENDING
+    ).update(status=OutboxMessage.QUEUED, claimed_at=None)
+
+
+def _send_batch(connection, outbox):
+    sent = []
+    for item in outbox:
+        try:
+            connection.send_messages([pickle.loads(item.message)])
+        except Exception as error:
+            item.attempts += 1
+            item.last_error = repr(error)
+            if item.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                item.status = OutboxMessage.FAILED
+                logger.error('Письмо %s не отправлено: %r', item.pk, error)
+            else:
+                item.status = OutboxMessage.QUEUED
+                item.send_at = timezone.now() + timezone.timedelta(
+                    seconds=settings.OUTBOX_RETRY_BACKOFF
+                    * 2 ** (item.attempts - 1)
+                )
+            item.save(update_fields=(
+                'attempts', 'last_error', 'status', 'send_at'
+            ))
+        else:
+            sent.append(item.pk)
+    OutboxMessage.objects.filter(pk__in=sent).update(
+        status=OutboxMessage.SENT, sent_at=timezone.now(),
+        attempts=F('attempts') + 1, last_error=''
+    )
+    return len(sent)
+
+
+@task
+def deliver_outbox():
+    """Отправляет очередь писем пачками через одно соединение.
+
+    Если почтовый сервер недоступен, задача падает до захвата писем
+    и повторяется механизмом задач. Письма, которые не удалось
+    отправить, откладываются, а задача планирует себя на момент,
+    когда подойдёт срок ближайшего из них. Если задача упала посреди
+    пачки, захват пачки снимается, чтобы письма не зависли
+    в статусе «Отправляется», даже когда попытки задачи кончились.
+    """
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    connection.open()
+    sent = 0
+    outbox = []
+    try:
+        while True:
+            outbox = claim_messages(settings.OUTBOX_BATCH_SIZE)
+            if not outbox:
+                break
+            sent += _send_batch(connection, outbox)
+    except Exception:
+        release_messages(outbox)
+        raise
+    finally:
+        connection.close()
+
+    retry = OutboxMessage.objects.filter(
+        status=OutboxMessage.QUEUED
+    ).order_by('send_at').values_list('send_at', flat=True).first()
+    if retry is not None:
+        schedule_delivery(max((retry - timezone.now()).total_seconds(), 0))
+    return sent
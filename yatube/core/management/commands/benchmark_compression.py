@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core import middleware
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько байт экономят минификация HTML и сжатие '
+        'gzip/brotli и сколько процессорного времени это стоит.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/'],
+            help='Адреса страниц, например / или /profile/leo/.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз повторить каждую операцию.'
+        )
+
+    def handle(self, *args, **options):
+        own = ('core.middleware.CompressionMiddleware',
+               'core.middleware.HtmlMinifyMiddleware')
+        raw_middleware = [m for m in settings.MIDDLEWARE if m not in own]
+        encodings = ['gzip'] + (['br'] if middleware.brotli else [])
+
+        with override_settings(MIDDLEWARE=raw_middleware):
+            client = Client()
+            for path in options['paths']:
+                response = client.get(path)
+                if response.status_code != 200:
+                    self.stderr.write(f'{path}: код {response.status_code}')
+                    continue
+                self._report(path, response.content, encodings,
+                             options['repeat'])
+
+    def _measure(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return result, (time.perf_counter() - start) / repeat * 1000
+
+    def _report(self, path, content, encodings, repeat):
+        html = content.decode()
+        minified, minify_ms = self._measure(
+            lambda: middleware.minify_html(html).encode(), repeat
+        )
+        self.stdout.write(f'{path}: исходно {len(content)} байт')
+        self.stdout.write(
+            f'  минификация: {len(minified)} байт '
+            f'(-{len(content) - len(minified)}), {minify_ms:.3f} мс'
+        )
+        for encoding in encodings:
+            compressed, compress_ms = self._measure(
+                lambda: middleware.compress(minified, encoding), repeat
+            )
+            self.stdout.write(
+                f'  {encoding}: {len(compressed)} байт '
+                f'(-{len(content) - len(compressed)}), {compress_ms:.3f} мс'
+            )
@@ -0,0 +1,108 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from core.tasks import claim_tasks, get_stats, load_tasks, run_task
+
+
+def _forget_connections():
+    # Соединения родителя после fork использовать нельзя: дочерний
+    # процесс откроет свои при первом запросе.
+    for conn in connections.all():
+        conn.connection = None
+
+
+def _execute(pk):
+    try:
+        task = run_task(pk)
+        return task.name, task.get_status_display(), task.duration
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из таблицы Task пулом потоков '
+        'или процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASK_WORKERS,
+            help='Размер пула (0 — выполнять в текущем потоке).'
+        )
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+            help='Пул потоков или процессов.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.TASK_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать метрики по задачам и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self._report_stats()
+            return
+
+        load_tasks()
+        workers = options['workers']
+        executor = self._make_executor(workers, options['mode'])
+        try:
+            while True:
+                pks = claim_tasks(max(workers, 1))
+                if pks:
+                    self._run(executor, pks)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _make_executor(self, workers, mode):
+        if not workers:
+            return None
+        if mode == 'process':
+            return ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('fork'),
+                initializer=_forget_connections
+            )
+        return ThreadPoolExecutor(workers)
+
+    def _run(self, executor, pks):
+        if executor is None:
+            results = [
+                (task.name, task.get_status_display(), task.duration)
+                for task in map(run_task, pks)
+            ]
+        else:
+            results = executor.map(_execute, pks)
+        for name, status, duration in results:
+            self.stdout.write(f'{name}: {status}, {duration:.3f} с')
+
+    def _report_stats(self):
+        for row in get_stats():
+            self.stdout.write(
+                f"{row['name']}: всего {row['total']}, "
+                f"выполнено {row['done']}, не удалось {row['failed']}, "
+                f"в очереди {row['queued']}, "
+                f"среднее {row['avg_duration'] or 0:.3f} с, "
+                f"худшее {row['max_duration'] or 0:.3f} с"
+            )
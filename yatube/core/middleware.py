@@ -0,0 +1,147 @@
+import re
+import zlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Короткие ответы сжимать невыгодно: заголовки gzip съедят весь выигрыш.
+MIN_COMPRESS_LENGTH = 200
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|[\w.-]+\+xml))'
+)
+# Содержимое этих тегов выводится как есть, пробелы в нём трогать нельзя.
+PRESERVED_BLOCKS = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+WHITESPACE = re.compile(r'\s+')
+
+
+def _collapse_whitespace(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def minify_html(html):
+    """Схлопывает пробельные последовательности вне <pre>, <textarea> и т.п.
+
+    Браузер и так отображает любую последовательность пробелов как один
+    пробел, поэтому замена не меняет вид страницы.
+    """
+    parts = PRESERVED_BLOCKS.split(html)
+    # split с двумя группами возвращает: текст, блок, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        parts[index] = WHITESPACE.sub(_collapse_whitespace, parts[index])
+    return ''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2
+    )
+
+
+def choose_encoding(accept_encoding):
+    """Выбирает br или gzip по заголовку Accept-Encoding."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    for coding in codings:
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_sequence(sequence, encoding):
+    """Сжимает поток по частям, отдавая каждую часть сразу."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in sequence:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class HtmlMinifyMiddleware(MiddlewareMixin):
+    """Убирает из HTML-ответов лишние пробелы и отступы шаблонов."""
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+        response.content = minify_html(
+            response.content.decode(response.charset)
+        )
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip, в том числе потоковые.
+
+    Подключается первым в MIDDLEWARE, чтобы сжимать окончательный ответ.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and (
+            len(response.content) < MIN_COMPRESS_LENGTH
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Тема')),
+                ('recipients', models.TextField(verbose_name='Получатели')),
+                ('message', models.BinaryField(verbose_name='Письмо (pickle)')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не отправлено')], default='queued', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('send_at', models.DateTimeField(verbose_name='Отправить не раньше')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в работу')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Письмо',
+                'verbose_name_plural': 'Исходящие письма',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['status', 'send_at'], name='core_outbox_status_7e1dfd_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """Отложенная задача в очереди; её выполняет команда run_workers."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не удалась'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы (JSON)', default='{}')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запустить не раньше')
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    started_at = models.DateTimeField('Начало', blank=True, null=True)
+    finished_at = models.DateTimeField('Окончание', blank=True, null=True)
+    duration = models.FloatField('Длительность, с', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (
+            models.Index(fields=('status', 'run_at')),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ожидающее отправки фоновой задачей deliver_outbox."""
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    message = models.BinaryField('Письмо (pickle)')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    send_at = models.DateTimeField('Отправить не раньше')
+    claimed_at = models.DateTimeField('Взято в работу', blank=True, null=True)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(fields=('status', 'send_at')),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.subject} -> {self.recipients}'
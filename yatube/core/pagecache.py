@@ -0,0 +1,90 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+
+from .fragments import substitute_fragments
+
+PAGE_CACHE_KEY = 'page:{generation}:{digest}'
+PAGE_GENERATION_KEY = 'page:generation'
+
+
+def _get_generation():
+    generation = cache.get(PAGE_GENERATION_KEY)
+    if generation is None:
+        # Начинаем с текущего времени: если ключ вытеснят из кэша,
+        # новое поколение всё равно окажется больше всех прежних.
+        cache.add(PAGE_GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(PAGE_GENERATION_KEY)
+    return generation
+
+
+def invalidate_pages():
+    """Сбрасывает все закэшированные страницы сменой поколения."""
+    try:
+        cache.incr(PAGE_GENERATION_KEY)
+    except ValueError:
+        _get_generation()
+
+
+def is_anonymous_request(request):
+    """Запрос без сессии и CSRF-куки видит ту же страницу, что и все."""
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and settings.CSRF_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def get_page_cache_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_CACHE_KEY.format(
+        generation=_get_generation(), digest=digest
+    )
+
+
+def cache_shared_page(view_func):
+    """Кэширует страницу одну на всех посетителей.
+
+    Ключ — путь вместе с query string. Персональные части страницы
+    (шапка, кнопка подписки, форма комментария) выводятся тегом
+    {% user_fragment %}: в кэш попадают только их метки, а при каждом
+    запросе на их место подставляются фрагменты для текущего
+    пользователя. Анонимным ответам ставится Cache-Control: public,
+    по которому страницу может кэшировать и reverse proxy. Метки
+    подставляются и при PAGE_CACHE_TIMEOUT = 0, поэтому фрагменты
+    можно ставить внутри {% cache %} шаблона.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        cacheable = timeout and request.method in ('GET', 'HEAD')
+        response = None
+        if cacheable:
+            key = get_page_cache_key(request)
+            response = cache.get(key)
+        if response is None:
+            # Метки ставятся и без кэша страниц: иначе фрагменты
+            # одного пользователя попали бы в {% cache %} шаблона.
+            request.defer_fragments = True
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                # Страницы ошибок рендерятся уже без меток.
+                request.defer_fragments = False
+            if (cacheable and response.status_code == 200
+                    and not response.cookies):
+                cache.set(key, response, timeout)
+
+        if not response.streaming:
+            response.content = substitute_fragments(
+                request, response.content.decode(response.charset)
+            )
+        if cacheable and is_anonymous_request(request):
+            patch_cache_control(response, public=True, max_age=timeout)
+        else:
+            patch_cache_control(response, private=True)
+        return response
+    return wrapper
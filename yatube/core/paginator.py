@@ -0,0 +1,182 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+PAGINATOR_COUNT_KEY = 'paginator_count:{}'
+ELLIPSIS = '…'
+
+
+class KeysetPage:
+    """Страница выборки, полученная по курсору, а не по номеру."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def get_keyset_page(queryset, cursor, per_page):
+    """Возвращает объекты с id меньше курсора, от новых к старым.
+
+    Вместо OFFSET и COUNT(*) выполняется один запрос по индексу,
+    поэтому стоимость страницы не зависит от её глубины.
+    """
+    try:
+        cursor = int(cursor)
+    except (TypeError, ValueError):
+        cursor = None
+    if cursor is not None:
+        queryset = queryset.filter(id__lt=cursor)
+    object_list = list(queryset.order_by('-id')[:per_page + 1])
+    if len(object_list) <= per_page:
+        return KeysetPage(object_list, None)
+    object_list = object_list[:per_page]
+    return KeysetPage(object_list, object_list[-1].pk)
+
+
+class ChainedQuerySets:
+    """Две выборки, идущие в пагинаторе одна за другой.
+
+    Нужна для горячих и архивных постов: пока страница укладывается
+    в первую выборку, ко второй запросов нет. COUNT(*) первой выборки
+    выполняется, только если страница целиком лежит за её концом.
+    """
+    ordered = True
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def count(self):
+        return self.first.count() + self.second.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        items = list(self.first[start:stop])
+        if len(items) == stop - start:
+            return items
+        offset = 0 if items else max(start - self.first.count(), 0)
+        return items + list(
+            self.second[offset:offset + stop - start - len(items)]
+        )
+
+
+def get_elided_page_range(paginator, number, on_each_side=3, on_ends=2):
+    """Номера страниц для навигации: края и окно вокруг текущей.
+
+    Пропуски между ними обозначаются ELLIPSIS, поэтому число ссылок
+    не растёт вместе с количеством страниц.
+    """
+    num_pages = paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from range(1, num_pages + 1)
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+def adjust_count(scope, delta):
+    """Поправляет закэшированное число объектов без COUNT(*)."""
+    try:
+        cache.incr(PAGINATOR_COUNT_KEY.format(scope), delta)
+    except ValueError:
+        pass
+
+
+def reset_counts(scopes):
+    """Удаляет закэшированные числа: их пересчитают при следующем запросе."""
+    cache.delete_many([PAGINATOR_COUNT_KEY.format(scope) for scope in scopes])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт число объектов из кэша.
+
+    Точный COUNT(*) выполняется только при первом обращении к scope.
+    Когда значение устаревает, его продолжают отдавать, а пересчёт
+    запускается в фоновом потоке — не больше одного на scope.
+    Глубина навигации ограничена PAGINATOR_MAX_PAGES, а с limit
+    объекты считаются не дальше limit строк.
+    """
+
+    def __init__(self, object_list, per_page, scope, limit=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scope = scope
+        self.limit = limit
+        self.count_key = PAGINATOR_COUNT_KEY.format(scope)
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.count_key)
+        if count is None:
+            return self.refresh_count()
+        if cache.add(
+            self.count_key + ':fresh', True,
+            settings.PAGINATOR_COUNT_TIMEOUT
+        ):
+            threading.Thread(target=self._refresh_in_background,
+                             daemon=True).start()
+        return count
+
+    @cached_property
+    def num_pages(self):
+        return min(super().num_pages, settings.PAGINATOR_MAX_PAGES)
+
+    def refresh_count(self):
+        """Считает объекты заново и кладёт результат в кэш."""
+        object_list = self.object_list
+        if self.limit is not None:
+            object_list = object_list[:self.limit]
+        count = object_list.count()
+        cache.set(
+            self.count_key, count, settings.PAGINATOR_COUNT_STALE_TIMEOUT
+        )
+        cache.set(
+            self.count_key + ':fresh', True, settings.PAGINATOR_COUNT_TIMEOUT
+        )
+        return count
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh_count()
+        except Exception as error:
+            logger.warning('Не удалось пересчитать %s: %s', self.scope, error)
+        finally:
+            connection.close()
+
+    def page(self, number):
+        # Срез не обрезается по count: при устаревшем значении последняя
+        # страница всё равно покажет все объекты, которые есть в базе.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
@@ -0,0 +1,84 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+RATE_LIMIT_KEY = 'ratelimit:{scope}:{kind}:{ident}'
+
+
+def _take_token(key, burst, period):
+    """Забирает токен из ведра; False, если ведро пустое.
+
+    Ведро ёмкостью burst наполняется за period секунд. В кэше хранятся
+    время начала отсчёта и число забранных токенов, число меняется
+    только атомарными incr/decr, так что лимитер не трогает БД.
+    """
+    now = time.time()
+    start_key, taken_key = f'{key}:start', f'{key}:taken'
+    cache.add(start_key, now, period)
+    cache.add(taken_key, 0, period)
+    start = cache.get(start_key, now)
+    try:
+        taken = cache.incr(taken_key)
+    except ValueError:
+        # Ключ вытеснили между add и incr: считаем ведро полным.
+        cache.set_many({start_key: now, taken_key: 1}, period)
+        return True
+
+    refilled = (now - start) * burst / period
+    if refilled >= taken - 1:
+        # Ведро успело наполниться: начинаем отсчёт заново.
+        cache.set_many({start_key: now, taken_key: 1}, period)
+        return True
+    cache.touch(start_key, period)
+    cache.touch(taken_key, period)
+    if taken > burst + refilled:
+        cache.decr(taken_key)
+        return False
+    return True
+
+
+def _get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def rate_limit(scope):
+    """Ограничивает частоту POST-запросов к view.
+
+    Лимиты берутся из settings.RATE_LIMITS[scope]: пары (burst, period)
+    отдельно для пользователя и для IP-адреса. Лишние запросы получают
+    ответ 429 до того, как view обратится к ORM.
+
+    Вёдра живут в кэше default. С LocMemCache у каждого процесса свои
+    вёдра, которые пропадают при перезапуске, так что при N процессах
+    фактический лимит — до N× заданного. Общим он станет только
+    с кэшем, разделяемым процессами (memcached, Redis).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            limits = settings.RATE_LIMITS.get(scope)
+            if request.method != 'POST' or not limits:
+                return view_func(request, *args, **kwargs)
+
+            idents = {'ip': _get_client_ip(request)}
+            if request.user.is_authenticated:
+                idents['user'] = request.user.pk
+            for kind, ident in idents.items():
+                if kind not in limits:
+                    continue
+                burst, period = limits[kind]
+                key = RATE_LIMIT_KEY.format(
+                    scope=scope, kind=kind, ident=ident
+                )
+                if not _take_token(key, burst, period):
+                    response = render(
+                        request, 'core/429.html', status=429
+                    )
+                    response['Retry-After'] = max(1, int(period / burst))
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,57 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями рядом.
+
+    collectstatic сохраняет каждый файл как name.<hash>.ext и кладёт
+    рядом .gz и .br (если установлен brotli), так что веб-сервер может
+    отдавать их с заголовками бессрочного кэширования, не сжимая файлы
+    на каждый запрос.
+    """
+    compressible_extensions = (
+        '.css', '.js', '.svg', '.html', '.txt', '.xml', '.json', '.ico',
+        '.map',
+    )
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            # collectstatic ещё не запускали: отдаём исходные имена.
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(self.compressible_extensions):
+                yield from self._compress(name)
+
+    def _compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        variants = [('.gz', gzip.compress(content, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content):
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            yield name, name + suffix, True
+
+    def delete(self, name):
+        super().delete(name)
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(self.path(name) + suffix):
+                os.remove(self.path(name) + suffix)
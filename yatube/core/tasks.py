@@ -0,0 +1,138 @@
+import json
+import logging
+import time
+import traceback
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    У функции появляется метод delay(*args, **kwargs): он не вызывает
+    её, а записывает задачу в таблицу Task в текущей транзакции.
+    Аргументы должны сериализоваться в JSON.
+
+    Задача должна быть идемпотентной: после ошибки она повторяется,
+    а если выполняется дольше TASK_LOCK_TIMEOUT, claim_tasks отдаёт
+    её другому воркеру, пока первый ещё работает.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        def delay(*args, **kwargs):
+            return enqueue(name, args, kwargs, max_attempts=max_attempts)
+
+        func.delay = delay
+        func.task_name = name
+        _registry[name] = func
+        return func
+    return decorator(func) if func else decorator
+
+
+def load_tasks():
+    """Импортирует модули tasks всех приложений, чтобы заполнить реестр."""
+    autodiscover_modules('tasks')
+
+
+def enqueue(name, args=(), kwargs=None, max_attempts=None, countdown=0):
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_at=timezone.now() + timezone.timedelta(seconds=countdown),
+    )
+
+
+def claim_tasks(limit):
+    """Захватывает до limit готовых к запуску задач; возвращает их id.
+
+    В SQLite нет SELECT ... FOR UPDATE SKIP LOCKED, поэтому задача
+    захватывается условным UPDATE: если другой воркер успел первым,
+    UPDATE не затронет ни одной строки.
+    """
+    now = timezone.now()
+    # Задачи воркеров, которые упали посреди работы, возвращаются в очередь.
+    # Упавший воркер не отличить от медленного, поэтому долгая задача
+    # может запуститься второй раз — задачи обязаны быть идемпотентными.
+    Task.objects.filter(
+        status=Task.RUNNING,
+        started_at__lt=now - timezone.timedelta(
+            seconds=settings.TASK_LOCK_TIMEOUT
+        )
+    ).update(status=Task.QUEUED)
+
+    candidates = list(
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+    return [
+        pk for pk in candidates
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started_at=now, attempts=F('attempts') + 1
+        )
+    ]
+
+
+def run_task(pk):
+    """Выполняет захваченную задачу и записывает исход и длительность.
+
+    Упавшая задача возвращается в очередь с экспоненциальной паузой
+    TASK_RETRY_BACKOFF * 2 ** (попытка - 1), пока не кончатся попытки.
+    """
+    task = Task.objects.get(pk=pk)
+    started = time.monotonic()
+    try:
+        payload = json.loads(task.payload)
+        _registry[task.name](*payload['args'], **payload['kwargs'])
+    except Exception:
+        task.last_error = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            task.status = Task.FAILED
+            logger.error(
+                'Задача %s не удалась:\n%s', task.name, task.last_error
+            )
+        else:
+            task.status = Task.QUEUED
+            task.run_at = timezone.now() + timezone.timedelta(
+                seconds=settings.TASK_RETRY_BACKOFF * 2 ** (task.attempts - 1)
+            )
+    else:
+        task.status = Task.DONE
+    task.duration = time.monotonic() - started
+    task.finished_at = timezone.now()
+    task.save(update_fields=(
+        'status', 'run_at', 'duration', 'finished_at', 'last_error'
+    ))
+    return task
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи в текущем потоке; возвращает их."""
+    return [run_task(pk) for pk in claim_tasks(limit)]
+
+
+def get_stats():
+    """Метрики по задачам: число, ошибки, среднее и худшее время."""
+    return (
+        Task.objects.values('name')
+        .annotate(
+            total=Count('pk'),
+            done=Count('pk', filter=Q(status=Task.DONE)),
+            failed=Count('pk', filter=Q(status=Task.FAILED)),
+            queued=Count('pk', filter=Q(status=Task.QUEUED)),
+            avg_duration=Avg('duration'),
+            max_duration=Max('duration'),
+        )
+        .order_by('name')
+    )
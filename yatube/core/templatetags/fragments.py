@@ -0,0 +1,14 @@
+from django import template
+
+from core.fragments import get_fragment_marker, render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def user_fragment(context, name, **params):
+    """Выводит персональный фрагмент или его метку для общего кэша."""
+    request = context['request']
+    if getattr(request, 'defer_fragments', False):
+        return get_fragment_marker(name, params)
+    return render_fragment(request, name, params)
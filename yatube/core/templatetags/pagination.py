@@ -0,0 +1,14 @@
+from django import template
+
+from core.paginator import get_elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj, on_each_side=3, on_ends=2):
+    """Номера страниц для навигации с пропусками вместо середины."""
+    return list(get_elided_page_range(
+        page_obj.paginator, page_obj.number,
+        on_each_side=on_each_side, on_ends=on_ends
+    ))
@@ -0,0 +1,326 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .middleware import choose_encoding, compress_sequence, minify_html
+from .mail import deliver_outbox
+from .models import OutboxMessage, Task
+from .paginator import (ELLIPSIS, CachedCountPaginator, adjust_count,
+                        get_elided_page_range)
+from .tasks import claim_tasks, run_pending, task
+
+calls = []
+
+
+@task
+def record_call(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise RuntimeError('сломалось')
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Тестовый backend: считает соединения и не принимает адрес fail@."""
+    opened = 0
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+
+    def send_messages(self, messages):
+        if any('fail@' in to for m in messages for to in m.recipients()):
+            raise ConnectionError('отказ сервера')
+        return super().send_messages(messages)
+
+
+class CompressedStaticStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Каталоги создаются во временной папке системы только
+        # для этих тестов, а не при импорте модуля
+        cls.static_source = tempfile.mkdtemp()
+        cls.static_root = tempfile.mkdtemp()
+        cls.static_settings = override_settings(
+            STATICFILES_DIRS=[cls.static_source],
+            STATIC_ROOT=cls.static_root,
+        )
+        cls.static_settings.enable()
+        super().setUpClass()
+        os.makedirs(os.path.join(cls.static_source, 'css'))
+        with open(
+            os.path.join(cls.static_source, 'css', 'site.css'), 'w'
+        ) as f:
+            f.write('body { margin: 0; }\n' * 100)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.static_settings.disable()
+        shutil.rmtree(cls.static_source, ignore_errors=True)
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic пишет файл с хешем и сжатые копии рядом."""
+        call_command('collectstatic', interactive=False, verbosity=0)
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        for suffix in ('', '.gz', '.br'):
+            with self.subTest(suffix=suffix):
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(self.static_root, hashed + suffix)
+                    )
+                )
+        self.assertIn(hashed, staticfiles_storage.url('css/site.css'))
+
+    def test_names_without_manifest(self):
+        """Без collectstatic шаблоны получают исходные имена файлов."""
+        with tempfile.TemporaryDirectory() as empty_root:
+            with self.settings(STATIC_ROOT=empty_root):
+                self.assertEqual(
+                    staticfiles_storage.url('img/logo.png'),
+                    '/static/img/logo.png'
+                )
+
+
+class CompressionMiddlewareTests(TestCase):
+    def test_minify_keeps_preformatted_blocks(self):
+        """Минификация не трогает <pre> и <textarea>."""
+        html = (
+            '<div>\n    <p>  текст  </p>\n</div>'
+            '<pre>  a\n    b</pre><textarea>\n  c  </textarea>'
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<div>\n<p> текст </p>\n</div>'
+            '<pre>  a\n    b</pre><textarea>\n  c  </textarea>'
+        )
+
+    def test_choose_encoding(self):
+        """Кодировка выбирается по Accept-Encoding с учётом q=0."""
+        cases = {
+            'gzip, deflate, br': 'br',
+            'gzip': 'gzip',
+            'br;q=0, gzip': 'gzip',
+            'identity': None,
+            '': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header), expected)
+
+    def test_page_is_compressed(self):
+        """Страница сжимается, если клиент это поддерживает."""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Yatube', gzip.decompress(response.content).decode())
+
+    def test_streaming_response_compressed_incrementally(self):
+        """Потоковый ответ сжимается по частям."""
+        chunks = [b'<p>' + b'x' * 500 + b'</p>'] * 3
+        compressed = list(compress_sequence(iter(chunks), 'gzip'))
+        self.assertGreaterEqual(len(compressed), 3)
+        self.assertEqual(
+            gzip.decompress(b''.join(compressed)), b''.join(chunks)
+        )
+
+    def test_benchmark_command(self):
+        """Команда замеров выводит размеры для каждой кодировки."""
+        out = StringIO()
+        call_command('benchmark_compression', '/', '--repeat=1', stdout=out)
+        self.assertIn('gzip', out.getvalue())
+
+
+class CachedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for i in range(25):
+            get_user_model().objects.create_user(username=f'user{i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_paginator(self, per_page=10):
+        return CachedCountPaginator(
+            get_user_model().objects.order_by('id'), per_page, 'users'
+        )
+
+    def test_count_is_cached(self):
+        """COUNT(*) выполняется один раз, дальше число берётся из кэша."""
+        self.assertEqual(self.get_paginator().count, 25)
+        get_user_model().objects.create_user(username='late')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_paginator().count, 25)
+        adjust_count('users', 1)
+        self.assertEqual(self.get_paginator().count, 26)
+
+    def test_last_page_not_cut_by_stale_count(self):
+        """Устаревшее число не обрезает последнюю страницу."""
+        self.assertEqual(self.get_paginator().count, 25)
+        get_user_model().objects.create_user(username='late')
+        self.assertEqual(len(self.get_paginator().get_page(3)), 6)
+
+    @override_settings(PAGINATOR_MAX_PAGES=2)
+    def test_deep_pages_capped(self):
+        """Номер страницы глубже предела сводится к последней доступной."""
+        paginator = self.get_paginator()
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(paginator.get_page(1000).number, 2)
+
+    def test_elided_page_range(self):
+        """В навигации только края и окно вокруг текущей страницы."""
+        paginator = self.get_paginator(per_page=1)
+        self.assertEqual(
+            list(get_elided_page_range(paginator, 12)),
+            [1, 2, ELLIPSIS, 9, 10, 11, 12, 13, 14, 15, ELLIPSIS, 24, 25]
+        )
+        self.assertEqual(
+            list(get_elided_page_range(paginator, 1)),
+            [1, 2, 3, 4, ELLIPSIS, 24, 25]
+        )
+        self.assertEqual(
+            list(get_elided_page_range(self.get_paginator(), 2)),
+            [1, 2, 3]
+        )
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_enqueues_and_worker_runs(self):
+        """delay() только ставит задачу, воркер выполняет её и меряет время."""
+        record_call.delay('привет')
+        self.assertEqual(calls, [])
+        queued = Task.objects.get()
+        self.assertEqual(queued.status, Task.QUEUED)
+
+        out = StringIO()
+        call_command('run_workers', '--workers', '0', '--once', stdout=out)
+        self.assertEqual(calls, ['привет'])
+        done = Task.objects.get()
+        self.assertEqual(done.status, Task.DONE)
+        self.assertEqual(done.attempts, 1)
+        self.assertIsNotNone(done.duration)
+        self.assertIn('core.tests.record_call', out.getvalue())
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается с паузой, затем помечается failed."""
+        always_fails.delay()
+        before = timezone.now()
+        run_pending()
+        retried = Task.objects.get()
+        self.assertEqual(retried.status, Task.QUEUED)
+        self.assertIn('сломалось', retried.last_error)
+        self.assertGreaterEqual(
+            retried.run_at,
+            before + timezone.timedelta(seconds=settings.TASK_RETRY_BACKOFF)
+        )
+        self.assertEqual(run_pending(), [])
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_task_claimed_once(self):
+        """Задачу захватывает только один воркер; зависшие возвращаются."""
+        record_call.delay(1)
+        self.assertEqual(len(claim_tasks(10)), 1)
+        self.assertEqual(claim_tasks(10), [])
+        Task.objects.update(
+            started_at=timezone.now() - timezone.timedelta(
+                seconds=settings.TASK_LOCK_TIMEOUT + 1
+            )
+        )
+        self.assertEqual(len(claim_tasks(10)), 1)
+
+    def test_stats(self):
+        """--stats показывает метрики по каждой задаче."""
+        record_call.delay(1)
+        record_call.delay(2)
+        run_pending()
+        out = StringIO()
+        call_command('run_workers', '--stats', stdout=out)
+        self.assertIn('core.tests.record_call: всего 2, выполнено 2',
+                      out.getvalue())
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+    OUTBOX_EMAIL_BACKEND='core.tests.FlakyEmailBackend',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        FlakyEmailBackend.opened = 0
+
+    def test_password_reset_only_stores_message(self):
+        """Сброс пароля кладёт письмо в outbox, отправляет его воркер."""
+        get_user_model().objects.create_user(
+            username='leo', email='leo@example.com', password='pass'
+        )
+        response = Client().post(
+            reverse('users:email_reset'), {'email': 'leo@example.com'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxMessage.objects.get().status,
+                         OutboxMessage.QUEUED)
+        self.assertTrue(
+            Task.objects.filter(name=deliver_outbox.task_name).exists()
+        )
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['leo@example.com'])
+        self.assertEqual(OutboxMessage.objects.get().status,
+                         OutboxMessage.SENT)
+
+    @override_settings(OUTBOX_BATCH_SIZE=2)
+    def test_batches_share_connection_and_retry(self):
+        """Все пачки идут через одно соединение, отказы повторяются."""
+        for to in ('a@example.com', 'fail@example.com', 'b@example.com'):
+            mail.send_mail('Тема', 'Текст', 'site@example.com', [to])
+        self.assertEqual(Task.objects.count(), 1)
+
+        before = timezone.now()
+        run_pending()
+        self.assertEqual(FlakyEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        failed = OutboxMessage.objects.get(recipients='fail@example.com')
+        self.assertEqual(failed.status, OutboxMessage.QUEUED)
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreaterEqual(
+            failed.send_at,
+            before + timezone.timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF)
+        )
+        retry = Task.objects.get(status=Task.QUEUED)
+        self.assertGreaterEqual(retry.run_at, failed.send_at)
+
+    def test_claims_released_when_task_fails(self):
+        """Упавшая посреди пачки задача возвращает письма в очередь."""
+        mail.send_mail('Тема', 'Текст', 'site@example.com', ['a@example.com'])
+        with mock.patch('core.mail._send_batch', side_effect=RuntimeError):
+            run_pending()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.QUEUED)
+        self.assertIsNone(message.claimed_at)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
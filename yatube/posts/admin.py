@@ -1,10 +1,170 @@
+import datetime
+import hashlib
+import json
+from collections import defaultdict
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, SEARCH_VAR
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from core.paginator import CachedCountPaginator
+from .bulk import change_posts, delete_comments, run_in_batches
+from .models import (ArchivedComment, ArchivedPost, Comment, Group, Post,
+                     User)
+from .signals import posts_bulk_changed
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
+
+
+class DateRangeForm(forms.Form):
+    since = forms.DateField(label='С')
+    until = forms.DateField(label='По (включительно)')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError('Начало периода позже его конца.')
+        return cleaned_data
+
+    def get_range(self):
+        """Начало первого дня и начало дня после последнего."""
+        return [
+            timezone.make_aware(
+                datetime.datetime.combine(day, datetime.time.min)
+            )
+            for day in (
+                self.cleaned_data['since'],
+                self.cleaned_data['until'] + datetime.timedelta(days=1)
+            )
+        ]
+
+
+class ChangeListPaginator(CachedCountPaginator):
+    """Пагинатор списка админки.
+
+    По числу строк админка решает, показывать ли пагинацию, поэтому
+    закэшированное число не больше одной страницы пересчитывается
+    сразу: устаревшее значение вывело бы весь список на одну страницу.
+    """
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.count_key)
+        if count is not None and count <= self.per_page:
+            return self.refresh_count()
+        return super().count
+
+
+class CachedCountAdmin(admin.ModelAdmin):
+    """Список объектов без COUNT(*) на каждый показ страницы.
+
+    Число строк для пагинации берётся из кэша отдельно для каждого
+    набора фильтров и поиска. Результаты поиска считаются не дальше
+    ADMIN_SEARCH_COUNT_LIMIT строк, общее число объектов рядом с ними
+    не считается. «Показать все» отключено: решение о нём принималось
+    бы по устаревшему числу строк.
+    """
+    show_full_result_count = False
+    list_max_show_all = 0
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        params = request.GET.copy()
+        params.pop(PAGE_VAR, None)
+        params.pop(ORDER_VAR, None)
+        digest = hashlib.md5(params.urlencode().encode()).hexdigest()
+        limit = None
+        if params.get(SEARCH_VAR):
+            limit = settings.ADMIN_SEARCH_COUNT_LIMIT
+        return ChangeListPaginator(
+            queryset, per_page, f'admin:{self.opts.label_lower}:{digest}',
+            limit=limit, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page
+        )
+
+
+class BulkActionMixin:
+    """Действия, которые меняют выборку пачками, а не по объекту."""
+
+    def get_action_form(self, request, form_class):
+        """Форма действия; заполнена, если её отправили со страницы."""
+        return form_class(request.POST if 'apply' in request.POST else None)
+
+    def render_bulk_action(self, request, action, description, form=None):
+        """Промежуточная страница действия: форма или подтверждение."""
+        return TemplateResponse(request, 'admin/posts/bulk_action.html', {
+            **self.admin_site.each_context(request),
+            'title': getattr(self, action).short_description,
+            'opts': self.opts,
+            'action': action,
+            'description': description,
+            'form': form,
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', 0),
+        })
+
+
+def get_author_ids(queryset):
+    return list(
+        queryset.order_by().values_list('author_id', flat=True).distinct()
+    )
+
+
+def delete_author_posts(author_ids):
+    """Удаляет пачками архивные и свежие посты авторов.
+
+    Кэши сбрасываются один раз, после постов обеих таблиц.
+    """
+    archived = ArchivedPost.objects.filter(author__in=author_ids)
+    group_ids = set(
+        archived.order_by().values_list('group_id', flat=True).distinct()
+    )
+    archived_done, archived_batches = run_in_batches(
+        archived, lambda batch: batch.delete()
+    )
+    done, batches = change_posts(
+        Post.objects.filter(author__in=author_ids),
+        lambda batch: batch.delete(),
+        group_ids=group_ids, author_ids=author_ids
+    )
+    return archived_done + done, archived_batches + batches
+
 
-from .models import Comment, Group, Post
+def delete_author_comments(author_ids):
+    """Удаляет пачками свежие и архивные комментарии авторов."""
+    done = batches = 0
+    for model in (Comment, ArchivedComment):
+        deleted, model_batches = delete_comments(
+            model.objects.filter(author__in=author_ids)
+        )
+        done += deleted
+        batches += model_batches
+    return done, batches
+
+
+def get_usernames(author_ids):
+    return ', '.join(
+        User.objects.filter(pk__in=author_ids).values_list(
+            'username', flat=True
+        )
+    )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BulkActionMixin, CachedCountAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,10 +172,148 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
+    list_select_related = ('author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    actions = ('move_to_group', 'delete_by_author', 'delete_by_date_range')
+
+    def move_to_group(self, request, queryset):
+        form = self.get_action_form(request, MoveToGroupForm)
+        if not form.is_valid():
+            return self.render_bulk_action(
+                request, 'move_to_group',
+                'Выбранные посты будут перенесены в группу.', form
+            )
+        group = form.cleaned_data['group']
+        done, batches = change_posts(
+            queryset, lambda batch: batch.update(group=group),
+            group_ids=(group.pk,)
+        )
+        self.message_user(
+            request, f'Перенесено постов: {done}, пачек: {batches}.'
+        )
+    move_to_group.short_description = 'Перенести в группу'
+
+    def delete_by_author(self, request, queryset):
+        author_ids = get_author_ids(queryset)
+        if 'apply' not in request.POST:
+            return self.render_bulk_action(
+                request, 'delete_by_author',
+                'Будут удалены все посты и комментарии авторов: '
+                f'{get_usernames(author_ids)}.'
+            )
+        posts, batches = delete_author_posts(author_ids)
+        comments, comment_batches = delete_author_comments(author_ids)
+        self.message_user(
+            request, f'Удалено постов: {posts}, комментариев: {comments}, '
+            f'пачек: {batches + comment_batches}.'
+        )
+    delete_by_author.short_description = (
+        'Удалить все посты и комментарии авторов'
+    )
+
+    def delete_by_date_range(self, request, queryset):
+        form = self.get_action_form(request, DateRangeForm)
+        if not form.is_valid():
+            return self.render_bulk_action(
+                request, 'delete_by_date_range',
+                'Будут удалены выбранные посты, опубликованные в этот период.',
+                form
+            )
+        since, until = form.get_range()
+        done, batches = change_posts(
+            queryset.filter(pub_date__gte=since, pub_date__lt=until),
+            lambda batch: batch.delete()
+        )
+        self.message_user(
+            request, f'Удалено постов: {done}, пачек: {batches}.'
+        )
+    delete_by_date_range.short_description = (
+        'Удалить выбранные посты за период'
+    )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Список групп читается один раз, а не в каждой строке списка.
+            # iter() — чтобы list() не спрашивал len() и не делал COUNT(*).
+            formfield.choices = list(iter(formfield.choices))
+        return formfield
+
+    def changelist_view(self, request, extra_context=None):
+        if (request.method == 'POST' and '_save' in request.POST
+                and self.has_change_permission(request)):
+            changes = self._get_group_changes(request)
+            if changes is not None:
+                self._change_groups(request, changes)
+                return HttpResponseRedirect(request.get_full_path())
+        return super().changelist_view(request, extra_context)
+
+    def _get_group_changes(self, request):
+        """Новые группы постов из формы списка: {id поста: id группы}.
+
+        Возвращает None, если форма некорректна: тогда её разберёт
+        обычный formset и покажет ошибки.
+        """
+        prefix = self.get_changelist_formset(request).get_default_prefix()
+        data = request.POST
+        rows = {}
+        try:
+            for i in range(int(data[f'{prefix}-TOTAL_FORMS'])):
+                group = data[f'{prefix}-{i}-group']
+                rows[int(data[f'{prefix}-{i}-id'])] = (
+                    int(group) if group else None
+                )
+        except (KeyError, ValueError):
+            return None
+        groups = set(rows.values()) - {None}
+        if Group.objects.filter(pk__in=groups).count() != len(groups):
+            return None
+        current = dict(
+            Post.objects.filter(pk__in=rows).values_list('pk', 'group_id')
+        )
+        if len(current) != len(rows):
+            return None
+        return {
+            pk: group for pk, group in rows.items() if current[pk] != group
+        }
+
+    def _change_groups(self, request, changes):
+        """Переносит посты одним UPDATE на каждую новую группу."""
+        by_group = defaultdict(list)
+        for pk, group in changes.items():
+            by_group[group].append(pk)
+        posts = list(
+            Post.objects.filter(pk__in=changes)
+            .only('text', 'author_id', 'group_id')
+        )
+        content_type = ContentType.objects.get_for_model(Post)
+        with transaction.atomic():
+            for group, pks in by_group.items():
+                Post.objects.filter(pk__in=pks).update(group_id=group)
+            LogEntry.objects.bulk_create([
+                LogEntry(
+                    user_id=request.user.pk,
+                    content_type=content_type,
+                    object_id=str(post.pk),
+                    object_repr=str(post)[:200],
+                    action_flag=CHANGE,
+                    change_message=json.dumps(
+                        [{'changed': {'fields': ['group']}}]
+                    ),
+                ) for post in posts
+            ])
+        posts_bulk_changed.send(
+            sender=Post,
+            author_ids={post.author_id for post in posts},
+            group_ids={post.group_id for post in posts} | set(by_group)
+        )
+        self.message_user(request, f'Изменено постов: {len(posts)}')
 
 
 @admin.register(Group)
@@ -30,7 +328,7 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(BulkActionMixin, CachedCountAdmin):
     list_display = (
         'pk',
         'post',
@@ -38,6 +336,40 @@ class CommentAdmin(admin.ModelAdmin):
         'text',
         'created'
     )
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author', 'parent')
     search_fields = ('text',)
     list_filter = ('created',)
+    date_hierarchy = 'created'
+    empty_value_display = '-пусто-'
+    actions = ('delete_by_author',)
+
+    def delete_by_author(self, request, queryset):
+        author_ids = get_author_ids(queryset)
+        if 'apply' not in request.POST:
+            return self.render_bulk_action(
+                request, 'delete_by_author',
+                'Будут удалены все комментарии авторов: '
+                f'{get_usernames(author_ids)}.'
+            )
+        done, batches = delete_author_comments(author_ids)
+        self.message_user(
+            request, f'Удалено комментариев: {done}, пачек: {batches}.'
+        )
+    delete_by_author.short_description = 'Удалить все комментарии авторов'
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(CachedCountAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'pub_date',
+        'author',
+        'group',
+        'archived_at',
+    )
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -0,0 +1,74 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from core.pagecache import invalidate_pages
+from .models import Post
+from .signals import bulk_change, posts_bulk_changed
+
+logger = logging.getLogger(__name__)
+
+
+def iter_pk_batches(queryset, size):
+    """id объектов выборки пачками по size, по курсору id."""
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    batch = list(pks[:size])
+    while batch:
+        yield batch
+        batch = list(pks.filter(pk__gt=batch[-1])[:size])
+
+
+def run_in_batches(queryset, apply, size=None):
+    """Вызывает apply для пачек выборки, каждую в своей транзакции.
+
+    apply получает QuerySet пачки. Пообъектный сброс кэшей отключён,
+    ход работы пишется в лог после каждой пачки.
+    Возвращает число обработанных объектов и число пачек.
+    """
+    size = size or settings.BULK_BATCH_SIZE
+    total = queryset.count()
+    done = batches = 0
+    with bulk_change():
+        for pks in iter_pk_batches(queryset, size):
+            with transaction.atomic():
+                apply(queryset.model.objects.filter(pk__in=pks))
+            done += len(pks)
+            batches += 1
+            logger.info(
+                '%s: пачка %d, обработано %d из %d',
+                queryset.model._meta.verbose_name_plural,
+                batches, done, total
+            )
+    return done, batches
+
+
+def change_posts(queryset, apply, group_ids=(), size=None, author_ids=()):
+    """run_in_batches для постов с одним posts_bulk_changed в конце.
+
+    group_ids и author_ids — группы и авторы, которые пачки затронут
+    помимо текущих групп и авторов постов, например группа, куда посты
+    переносятся. Сигнал уходит и при ошибке: пачки до неё уже сохранены.
+    """
+    author_ids, group_ids = set(author_ids), set(group_ids)
+
+    def collect_and_apply(batch):
+        for author_id, group_id in batch.values_list('author_id', 'group_id'):
+            author_ids.add(author_id)
+            group_ids.add(group_id)
+        apply(batch)
+
+    try:
+        return run_in_batches(queryset, collect_and_apply, size)
+    finally:
+        posts_bulk_changed.send(
+            sender=Post, author_ids=author_ids, group_ids=group_ids
+        )
+
+
+def delete_comments(queryset):
+    """Удаляет комментарии пачками и один раз сбрасывает страницы."""
+    try:
+        return run_in_batches(queryset, lambda batch: batch.delete())
+    finally:
+        invalidate_pages()
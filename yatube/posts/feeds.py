@@ -0,0 +1,172 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from .models import Group, Post, User
+
+FEED_CACHE_KEY = 'feed:{scope}:{kind}'
+FEED_KINDS = ('rss', 'atom')
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+    size = 20
+
+    def link(self):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related('author')[:self.size]
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def _get_related_values(posts, name, attr):
+    """Поле attr связанных объектов постов.
+
+    Берётся из уже загруженных связей, а недостающие объекты
+    читаются одним запросом по id.
+    """
+    values, missing = set(), set()
+    for post in posts:
+        field = post._meta.get_field(name)
+        pk = getattr(post, field.attname)
+        if pk is None:
+            continue
+        if field.is_cached(post):
+            values.add(getattr(getattr(post, name), attr))
+        else:
+            missing.add(pk)
+    if missing:
+        values.update(
+            field.related_model.objects.filter(pk__in=missing)
+            .values_list(attr, flat=True)
+        )
+    return values
+
+
+def get_feed_scopes(posts):
+    """Области лент, в которые попадают посты."""
+    return (
+        {'index'}
+        | {f'author:{username}' for username
+           in _get_related_values(posts, 'author', 'username')}
+        | {f'group:{slug}' for slug
+           in _get_related_values(posts, 'group', 'slug')}
+    )
+
+
+def invalidate_feeds(*posts, authors=(), groups=()):
+    """Сбрасывает ленты постов, авторов и групп одним delete_many."""
+    scopes = get_feed_scopes(posts)
+    scopes.update(f'author:{author.username}' for author in authors)
+    scopes.update(f'group:{group.slug}' for group in groups)
+    cache.delete_many([
+        FEED_CACHE_KEY.format(scope=scope, kind=kind)
+        for scope in scopes for kind in FEED_KINDS
+    ])
+
+
+def cached_feed(feed, scope, kind):
+    """Отдаёт ленту из кэша и поддерживает условные GET-запросы.
+
+    scope — шаблон области ленты, например 'group:{slug}', его
+    заполняют аргументы из URL. Тело ленты сбрасывается invalidate_feeds
+    при изменении постов этой области.
+    """
+    def view(request, **kwargs):
+        key = FEED_CACHE_KEY.format(scope=scope.format(**kwargs), kind=kind)
+        response = cache.get(key)
+        if response is None:
+            response = feed(request, **kwargs)
+            response['ETag'] = quote_etag(
+                hashlib.md5(response.content).hexdigest()
+            )
+            cache.set(key, response, settings.FEED_CACHE_TIMEOUT)
+        conditional = get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')
+            ),
+            response=response
+        )
+        return conditional or response
+    return view
@@ -1,6 +1,8 @@
 from django import forms
 
-from .models import Post, Comment
+from .models import Post, Comment, User
+
+FOLLOW_BATCH_LIMIT = 100
 
 
 class PostForm(forms.ModelForm):
@@ -13,3 +15,24 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class FollowBatchForm(forms.Form):
+    FOLLOW = 'follow'
+    UNFOLLOW = 'unfollow'
+
+    action = forms.ChoiceField(
+        choices=((FOLLOW, 'Подписаться'), (UNFOLLOW, 'Отписаться'))
+    )
+    authors = forms.ModelMultipleChoiceField(
+        queryset=User.objects.only('pk', 'username'),
+        to_field_name='username'
+    )
+
+    def clean_authors(self):
+        authors = self.cleaned_data['authors']
+        if len(authors) > FOLLOW_BATCH_LIMIT:
+            raise forms.ValidationError(
+                f'Нельзя обработать больше {FOLLOW_BATCH_LIMIT} авторов за раз'
+            )
+        return authors
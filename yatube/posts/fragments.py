@@ -0,0 +1,62 @@
+from core.fragments import user_fragment
+from .forms import CommentForm
+from .models import Like, Notification, PostCounter, likes_counter
+from .viewer import get_viewer
+
+
+@user_fragment('switcher', 'posts/includes/switcher.html')
+def switcher(request, active):
+    return {'active': active}
+
+
+@user_fragment('follow_button', 'posts/includes/follow_button.html')
+def follow_button(request, author_id, username, compact=False):
+    # compact — кнопка в карточке ленты: гостям её не показываем.
+    viewer = get_viewer(request)
+    return {
+        'username': username,
+        'compact': compact,
+        'hidden': viewer.is_self(author_id) or (
+            compact and not request.user.is_authenticated
+        ),
+        'following': viewer.follows(author_id),
+    }
+
+
+@user_fragment('post_edit_button', 'posts/includes/post_edit_button.html')
+def post_edit_button(request, post_id, author_id):
+    return {
+        'post_id': post_id,
+        'is_author': request.user.pk == author_id,
+    }
+
+
+@user_fragment('comment_form', 'posts/includes/comment_form.html')
+def comment_form(request, post_id, parent_id=None):
+    return {
+        'post_id': post_id,
+        'parent_id': parent_id,
+        'form': CommentForm(),
+    }
+
+
+@user_fragment('like_button', 'posts/includes/like_button.html')
+def like_button(request, post_id):
+    user = request.user
+    counts = PostCounter.get_counts('likes', likes_counter, [post_id])
+    return {
+        'post_id': post_id,
+        'likes': counts[post_id],
+        'liked': user.is_authenticated and Like.objects.filter(
+            user=user, post_id=post_id
+        ).exists(),
+    }
+
+
+@user_fragment('notifications_link', 'posts/includes/notifications_link.html')
+def notifications_link(request):
+    user = request.user
+    return {
+        'unread': user.is_authenticated
+        and Notification.objects.unread_count(user),
+    }
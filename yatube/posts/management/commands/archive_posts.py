@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import ArchivedPost, Post
+from posts.signals import bulk_change, posts_bulk_changed
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше заданного возраста вместе с комментариями '
+        'в архивные таблицы. Запускается по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить одной транзакцией.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между пачками в секундах, чтобы не держать БД.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(days=options['days'])
+        old_posts = Post.objects.filter(pub_date__lt=cutoff).order_by('id')
+        archived = 0
+        author_ids, group_ids = set(), set()
+        while True:
+            batch = list(old_posts[:options['batch_size']])
+            if not batch:
+                break
+            with bulk_change():
+                archived += ArchivedPost.objects.archive(batch)
+            for post in batch:
+                author_ids.add(post.author_id)
+                group_ids.add(post.group_id)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        # Посты остались в профилях и группах, но переехали в другую
+        # таблицу: счётчики, ленты и страницы сбрасываются один раз.
+        if archived:
+            posts_bulk_changed.send(
+                sender=Post, author_ids=author_ids, group_ids=group_ids
+            )
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
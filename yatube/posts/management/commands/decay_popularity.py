@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max
+from django.utils import timezone
+
+from posts.models import PopularityScore
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает рейтинги постов пропорционально времени, прошедшему '
+        'с прошлого запуска. Запускается по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life',
+            type=float,
+            default=settings.POPULARITY_HALF_LIFE,
+            help='Время в часах, за которое рейтинг уменьшается вдвое.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=settings.POPULARITY_MIN_SCORE,
+            help='Рейтинги ниже порога удаляются из таблицы.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        last = PopularityScore.objects.aggregate(
+            last=Max('decayed_at')
+        )['last']
+        factor = 1
+        if last is not None:
+            hours = (now - last).total_seconds() / 3600
+            factor = 0.5 ** (hours / options['half_life'])
+
+        updated = PopularityScore.objects.update(
+            value=F('value') * factor, decayed_at=now
+        )
+        removed, _ = PopularityScore.objects.filter(
+            value__lt=options['threshold']
+        ).delete()
+        self.stdout.write(
+            f'Рейтингов обновлено: {updated}, удалено: {removed}, '
+            f'множитель: {factor:.4f}'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import likes_counter, views_counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Сбрасывает накопленные в кэше счётчики постов в БД пачкой. '
+        'Видит только общий для процессов кэш: с LocMemCache счётчики '
+        'сбрасывают сами веб-процессы по порогу и интервалу.'
+    )
+
+    def handle(self, *args, **options):
+        for counter in (likes_counter, views_counter):
+            deltas = counter.flush()
+            self.stdout.write(
+                f'{counter.name}: обновлено постов {len(deltas)}'
+            )
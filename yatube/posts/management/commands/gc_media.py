@@ -0,0 +1,134 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки, на которые не ссылается ни один пост, '
+        'вместе с их миниатюрами и записями sorl-thumbnail.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько имён сверять с БД одним запросом.'
+        )
+        parser.add_argument(
+            '--max-rate', type=float, default=0,
+            help='Не больше стольких удалений в секунду (0 — без ограничений).'
+        )
+        parser.add_argument(
+            '--min-age', type=float, default=1,
+            help='Не трогать файлы моложе стольких часов: их пост может '
+                 'быть ещё не сохранён.'
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.delay = 1 / options['max_rate'] if options['max_rate'] else 0
+        self.upload_to = Post._meta.get_field('image').upload_to
+        self.deleted = 0
+
+        files = self._find_orphan_files(options['min_age'] * 3600)
+        thumbnails = self._find_orphan_sources()
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            f'{verb} файлов: {files}, записей миниатюр: {thumbnails}'
+        )
+
+    def _orphans(self, names):
+        """Имена из пачки, которых нет ни у Post, ни у ArchivedPost."""
+        live = set(
+            Post.objects.filter(image__in=names)
+            .values_list('image', flat=True).order_by()
+            .union(
+                ArchivedPost.objects.filter(image__in=names)
+                .values_list('image', flat=True).order_by()
+            )
+        )
+        return [name for name in names if name not in live]
+
+    def _throttle(self):
+        self.deleted += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def _iter_media_files(self, min_age):
+        root = os.path.join(settings.MEDIA_ROOT, self.upload_to)
+        oldest = time.time() - min_age
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.getmtime(path) > oldest:
+                    continue
+                yield os.path.relpath(path, settings.MEDIA_ROOT).replace(
+                    os.sep, '/'
+                )
+
+    def _find_orphan_files(self, min_age):
+        count = 0
+        batch = []
+        for name in self._iter_media_files(min_age):
+            batch.append(name)
+            if len(batch) >= self.batch_size:
+                count += self._delete_files(batch)
+                batch = []
+        if batch:
+            count += self._delete_files(batch)
+        return count
+
+    def _delete_files(self, names):
+        orphans = self._orphans(names)
+        for name in orphans:
+            self.stdout.write(f'Файл без поста: {name}')
+            if self.dry_run:
+                continue
+            os.remove(os.path.join(settings.MEDIA_ROOT, name))
+            self._throttle()
+        return len(orphans)
+
+    def _find_orphan_sources(self):
+        """Проходит по записям исходных картинок в хранилище sorl.
+
+        Записи читаются пачками по ключу (keyset), поэтому удаление
+        найденных сирот не мешает дальнейшему обходу таблицы.
+        """
+        prefix = add_prefix('', 'image')
+        count = 0
+        last_key = ''
+        while True:
+            rows = list(
+                KVStore.objects.filter(
+                    key__startswith=prefix, key__gt=last_key
+                ).order_by('key').values_list('key', 'value')[
+                    :self.batch_size
+                ]
+            )
+            if not rows:
+                return count
+            last_key = rows[-1][0]
+            sources = {}
+            for _, value in rows:
+                image_file = deserialize_image_file(value)
+                if image_file.name.startswith(self.upload_to):
+                    sources[image_file.name] = image_file
+            for name in self._orphans(list(sources)):
+                self.stdout.write(f'Миниатюры без поста: {name}')
+                count += 1
+                if not self.dry_run:
+                    default.kvstore.delete(sources[name])
+                    self._throttle()
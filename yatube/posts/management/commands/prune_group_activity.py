@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import GroupActivity
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет счётчики активности групп, вышедшие за окно трендов. '
+        'Запускается по расписанию (cron).'
+    )
+
+    def handle(self, *args, **options):
+        since = GroupActivity.get_bucket() - timezone.timedelta(
+            hours=settings.TRENDING_GROUPS_WINDOW
+        )
+        removed, _ = GroupActivity.objects.filter(bucket__lt=since).delete()
+        self.stdout.write(f'Удалено счётчиков: {removed}')
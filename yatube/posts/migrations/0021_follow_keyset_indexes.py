@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_follow_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', 'id'], name='posts_follo_author__90742d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', 'id'], name='posts_follo_user_id_7ff3a6_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_follow_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('value', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('decayed_at', models.DateTimeField(blank=True, null=True, verbose_name='Последнее затухание')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг поста',
+                'verbose_name_plural': 'Рейтинги постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='popularityscore',
+            index=models.Index(fields=['-value', '-post'], name='posts_popul_value_7aca49_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_popularityscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Начало часа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Новых постов')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupactivity',
+            index=models.Index(fields=['bucket'], name='posts_group_bucket_4a79b0_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivity',
+            constraint=models.UniqueConstraint(fields=('group', 'bucket'), name='unique_group_bucket'),
+        ),
+    ]
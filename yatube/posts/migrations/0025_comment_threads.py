@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_paths(apps, schema_editor):
+    # До веток все комментарии были корневыми
+    for name in ('Comment', 'ArchivedComment'):
+        model = apps.get_model('posts', name)
+        for comment in model.objects.filter(path='').only('pk').iterator():
+            model.objects.filter(pk=comment.pk).update(
+                path=f'{comment.pk:010d}'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.ArchivedComment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='path',
+            field=models.CharField(blank=True, max_length=80, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Комментарий, на который отвечают', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=80, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'path'], name='posts_archi_post_id_54df62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(
+            fill_comment_paths, migrations.RunPython.noop
+        ),
+    ]
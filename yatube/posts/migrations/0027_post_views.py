@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcounter',
+            name='views',
+            field=models.PositiveIntegerField(default=0, verbose_name='Просмотров'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['created'], name='posts_archi_created_1ed8d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='posts_comme_created_aa6d8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='posts_post_pub_dat_471922_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    stats = {
+        pk: GroupStats(group_id=pk)
+        for pk in Group.objects.values_list('pk', flat=True)
+    }
+    authors = {pk: set() for pk in stats}
+    for name in ('Post', 'ArchivedPost'):
+        posts = apps.get_model('posts', name).objects.filter(
+            group__isnull=False
+        ).order_by()
+        for row in posts.values('group').annotate(
+            total=models.Count('pk'), last=models.Max('pub_date')
+        ):
+            group_stats = stats[row['group']]
+            group_stats.posts_count += row['total']
+            group_stats.last_post_at = max(
+                filter(None, (group_stats.last_post_at, row['last']))
+            )
+        for group_id, author_id in posts.values_list(
+            'group', 'author'
+        ).distinct():
+            authors[group_id].add(author_id)
+    for pk, group_stats in stats.items():
+        group_stats.authors_count = len(authors[pk])
+    GroupStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('authors_count', models.PositiveIntegerField(default=0, verbose_name='Авторов')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at'], name='posts_group_last_po_6ea643_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_count'], name='posts_group_posts_c_355b83_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
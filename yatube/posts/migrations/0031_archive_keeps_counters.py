@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='likes',
+            field=models.IntegerField(default=0, verbose_name='Лайков'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='views',
+            field=models.PositiveIntegerField(default=0, verbose_name='Просмотров'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='archived_post',
+            field=models.ForeignKey(blank=True, help_text='Заполняется вместо post, когда пост уезжает в архив', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.ArchivedPost', verbose_name='Архивный пост'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.Post', verbose_name='Пост'),
+        ),
+    ]
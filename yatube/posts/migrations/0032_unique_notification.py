@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+def remove_duplicate_notifications(apps, schema_editor):
+    Notification = apps.get_model('posts', 'Notification')
+    duplicates = (
+        Notification.objects.filter(post__isnull=False)
+        .values('user', 'post')
+        .annotate(min_id=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        Notification.objects.filter(
+            user=row['user'], post=row['post']
+        ).exclude(id=row['min_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_archive_keeps_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_notifications, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_notification'),
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import DEFERRED
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.counters import BufferedCounter
 
 User = get_user_model()
 
@@ -48,15 +54,55 @@ class Post(models.Model):
         null=True
     )
 
+    is_archived = False
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date', )
+        indexes = (
+            models.Index(fields=('pub_date',)),
+        )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Группа, записанная в БД: по ней сигналы узнают о переносе
+        # поста. Отложенное поле не читаем, чтобы не делать запрос.
+        self.saved_group_id = self.__dict__.get('group_id', DEFERRED)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None or 'group' in fields or 'group_id' in fields:
+            self.saved_group_id = self.group_id
 
     def __str__(self) -> str:
         return self.text[:15]
 
 
+# Ключи закэшированного числа постов в ленте, группе и у автора
+INDEX_SCOPE = 'posts'
+GROUP_SCOPE = 'group:{}'
+AUTHOR_SCOPE = 'author:{}'
+
+COMMENT_PATH_STEP = 10
+COMMENT_MAX_DEPTH = 8
+
+
+def get_comment_path(parent, pk):
+    return (parent.path if parent else '') + f'{pk:0{COMMENT_PATH_STEP}d}'
+
+
+def get_subtree(comments, root):
+    """Ветка root одним запросом по диапазону (post, path).
+
+    Пути потомков начинаются с пути root и состоят из цифр,
+    поэтому все они меньше root.path + '~'.
+    """
+    return comments.filter(
+        path__gte=root.path, path__lt=root.path + '~'
+    ).order_by('path')
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -80,10 +126,107 @@ class Comment(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на',
+        help_text='Комментарий, на который отвечают'
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('post', 'path')),
+            models.Index(fields=('created',)),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def depth(self):
+        return len(self.path) // COMMENT_PATH_STEP - 1
+
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий и дописывает его id к пути родителя.
+
+        Путь из id предков фиксированной ширины сортируется так же,
+        как обход дерева в глубину, поэтому ветка любой глубины
+        достаётся одним запросом по диапазону путей. INSERT и запись
+        пути идут в одной транзакции: другие соединения не увидят
+        комментарий с пустым путём.
+        """
+        if self.parent and self.parent.depth >= COMMENT_MAX_DEPTH - 1:
+            # Слишком глубокие ответы становятся соседями родителя
+            self.parent = self.parent.parent
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path:
+                self.path = get_comment_path(self.parent, self.pk)
+                Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    def get_subtree(self):
+        """Комментарий со всеми ответами в порядке обхода дерева."""
+        return get_subtree(Comment.objects.filter(post_id=self.post_id), self)
+
+
+FOLLOW_COUNTS_KEY = 'follow_counts:{}'
+FOLLOWING_IDS_KEY = 'following_ids:{}'
+
+
+class FollowManager(models.Manager):
+    def follow(self, user, authors):
+        """Подписывает пользователя на авторов одним INSERT OR IGNORE."""
+        authors = [author for author in authors if author.pk != user.pk]
+        self.bulk_create(
+            [self.model(user=user, author=author) for author in authors],
+            ignore_conflicts=True
+        )
+        self._reset_counts(user, authors)
+
+    def unfollow(self, user, authors):
+        """Отписывает пользователя от авторов одним DELETE."""
+        authors = list(authors)
+        self.filter(user=user, author__in=authors).delete()
+        self._reset_counts(user, authors)
+
+    def counts(self, user):
+        """Число подписчиков и подписок пользователя из кэша."""
+        key = FOLLOW_COUNTS_KEY.format(user.pk)
+        counts = cache.get(key)
+        if counts is None:
+            counts = {
+                'followers': self.filter(author=user).count(),
+                'following': self.filter(user=user).count(),
+            }
+            cache.set(key, counts, settings.FOLLOW_CACHE_TIMEOUT)
+        return counts
+
+    def following_ids(self, user):
+        """Множество id авторов, на которых подписан пользователь, из кэша."""
+        key = FOLLOWING_IDS_KEY.format(user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                self.filter(user=user).values_list('author_id', flat=True)
+            )
+            cache.set(key, ids, settings.FOLLOW_CACHE_TIMEOUT)
+        return ids
+
+    def _reset_counts(self, user, authors):
+        cache.delete_many(
+            [FOLLOW_COUNTS_KEY.format(u.pk) for u in (user, *authors)]
+            + [FOLLOWING_IDS_KEY.format(user.pk)]
+        )
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -100,3 +243,624 @@ class Follow(models.Model):
         verbose_name='Автор',
         help_text='Автор, на которого подписались'
     )
+
+    objects = FollowManager()
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        indexes = (
+            models.Index(fields=('author', 'id')),
+            models.Index(fields=('user', 'id')),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.author}'
+
+
+class PopularityScore(models.Model):
+    """Рейтинг поста по свежим комментариям.
+
+    Каждый новый комментарий прибавляет единицу, а команда
+    decay_popularity периодически уменьшает все рейтинги разом,
+    так что старая активность постепенно забывается.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        verbose_name='Пост'
+    )
+    value = models.FloatField('Рейтинг', default=0)
+    decayed_at = models.DateTimeField(
+        'Последнее затухание',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+        indexes = (
+            models.Index(fields=('-value', '-post')),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.value:.2f}'
+
+    @classmethod
+    def bump(cls, post_id, amount=1):
+        """Увеличивает рейтинг поста без гонок: INSERT OR IGNORE + UPDATE."""
+        cls.objects.bulk_create(
+            [cls(post_id=post_id)], ignore_conflicts=True
+        )
+        cls.objects.filter(post_id=post_id).update(
+            value=models.F('value') + amount
+        )
+
+
+TRENDING_GROUPS_KEY = 'trending_groups'
+
+
+class GroupActivity(models.Model):
+    """Число новых постов в группе за один час.
+
+    Строки образуют скользящее окно: тренды считаются по последним
+    settings.TRENDING_GROUPS_WINDOW часам, а старые строки удаляет
+    команда prune_group_activity.
+    """
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Группа'
+    )
+    bucket = models.DateTimeField('Начало часа')
+    posts_count = models.PositiveIntegerField('Новых постов', default=0)
+
+    class Meta:
+        verbose_name = 'Активность группы'
+        verbose_name_plural = 'Активность групп'
+        indexes = (
+            models.Index(fields=('bucket',)),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('group', 'bucket'),
+                name='unique_group_bucket'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.group}: {self.posts_count} ({self.bucket:%d.%m %H}ч)'
+
+    @staticmethod
+    def get_bucket(moment=None):
+        moment = moment or timezone.now()
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def bump(cls, group_id, moment=None):
+        bucket = cls.get_bucket(moment)
+        cls.objects.bulk_create(
+            [cls(group_id=group_id, bucket=bucket)], ignore_conflicts=True
+        )
+        cls.objects.filter(group_id=group_id, bucket=bucket).update(
+            posts_count=models.F('posts_count') + 1
+        )
+
+    @classmethod
+    def trending(cls):
+        """Самые активные группы окна: список пар (группа, число постов).
+
+        Результат кэшируется, поэтому сайдбар и страница трендов
+        не обращаются к БД на каждом запросе.
+        """
+        trending = cache.get(TRENDING_GROUPS_KEY)
+        if trending is not None:
+            return trending
+
+        since = cls.get_bucket() - timezone.timedelta(
+            hours=settings.TRENDING_GROUPS_WINDOW - 1
+        )
+        rows = list(
+            cls.objects.filter(bucket__gte=since)
+            .values('group')
+            .annotate(total=models.Sum('posts_count'))
+            .order_by('-total', 'group')[:settings.TRENDING_GROUPS_SIZE]
+        )
+        groups = Group.objects.in_bulk([row['group'] for row in rows])
+        trending = [(groups[row['group']], row['total']) for row in rows]
+        cache.set(
+            TRENDING_GROUPS_KEY, trending,
+            settings.TRENDING_GROUPS_CACHE_TIMEOUT
+        )
+        return trending
+
+
+class ArchivedPostManager(models.Manager):
+    def archive(self, posts):
+        """Переносит пачку постов вместе с комментариями в архив.
+
+        Копирование и удаление из горячих таблиц выполняются
+        в одной транзакции, так что пост не пропадёт и не задвоится.
+        """
+        posts = list(posts)
+        post_ids = [post.id for post in posts]
+        comments = Comment.objects.filter(post__in=posts)
+        with transaction.atomic():
+            counters = {
+                post_id: (likes, views)
+                for post_id, likes, views in PostCounter.objects.filter(
+                    post_id__in=post_ids
+                ).values_list('post_id', 'likes', 'views')
+            }
+            self.bulk_create([
+                self.model(
+                    id=post.id,
+                    text=post.text,
+                    pub_date=post.pub_date,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                    likes=counters.get(post.id, (0, 0))[0],
+                    views=counters.get(post.id, (0, 0))[1],
+                ) for post in posts
+            ], ignore_conflicts=True)
+            ArchivedComment.objects.bulk_create([
+                ArchivedComment(
+                    id=comment.id,
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    created=comment.created,
+                    parent_id=comment.parent_id,
+                    path=comment.path,
+                ) for comment in comments.order_by('path')
+            ], ignore_conflicts=True)
+            # Иначе уведомления удалятся каскадом вместе с постом
+            Notification.objects.filter(post_id__in=post_ids).update(
+                post=None, archived_post_id=models.F('post_id')
+            )
+            Post.objects.filter(id__in=post_ids).delete()
+        return len(posts)
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому ссылки на пост
+    продолжают работать, а горячая таблица и её индексы остаются
+    маленькими. Лайки и просмотры переносятся из PostCounter
+    в поля likes и views; отдельные строки Like и рейтинг популярности
+    в архив не попадают.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        null=True
+    )
+    likes = models.IntegerField('Лайков', default=0)
+    views = models.PositiveIntegerField('Просмотров', default=0)
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    is_archived = True
+
+    objects = ArchivedPostManager()
+
+    class Meta:
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        ordering = ('-pub_date', )
+        indexes = (
+            models.Index(fields=('author', '-pub_date')),
+            models.Index(fields=('group', '-pub_date')),
+        )
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор комментария'
+    )
+    text = models.TextField('Комментарий')
+    created = models.DateTimeField('Дата публикации')
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = (
+            models.Index(fields=('post', 'path')),
+            models.Index(fields=('created',)),
+        )
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+    @property
+    def depth(self):
+        return len(self.path) // COMMENT_PATH_STEP - 1
+
+    def get_subtree(self):
+        return get_subtree(
+            ArchivedComment.objects.filter(post_id=self.post_id), self
+        )
+
+
+class PostCounter(models.Model):
+    """Сброшенные в БД значения буферизованных счётчиков поста."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counter',
+        verbose_name='Пост'
+    )
+    likes = models.IntegerField('Лайков', default=0)
+    views = models.PositiveIntegerField('Просмотров', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики поста'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.likes}, {self.views}'
+
+    @classmethod
+    def apply_deltas(cls, field, deltas):
+        """Прибавляет дельты {post_id: delta} к полю одной транзакцией.
+
+        Посты с одинаковой дельтой обновляются одним UPDATE, так что
+        число запросов зависит от разброса дельт, а не от числа постов.
+        Дельты постов, уехавших в архив, прибавляются к строке архива,
+        а удалённых — отбрасываются.
+        """
+        def by_delta(ids):
+            groups = {}
+            for post_id in ids:
+                groups.setdefault(deltas[post_id], []).append(post_id)
+            return groups.items()
+
+        post_ids = set(
+            Post.objects.filter(pk__in=deltas).values_list('pk', flat=True)
+        )
+        archived_ids = ArchivedPost.objects.filter(
+            pk__in=set(deltas) - post_ids
+        ).values_list('pk', flat=True)
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(post_id=post_id) for post_id in post_ids],
+                ignore_conflicts=True
+            )
+            for delta, ids in by_delta(post_ids):
+                cls.objects.filter(post_id__in=ids).update(
+                    **{field: models.F(field) + delta}
+                )
+            for delta, ids in by_delta(archived_ids):
+                ArchivedPost.objects.filter(pk__in=ids).update(
+                    **{field: models.F(field) + delta}
+                )
+
+    @classmethod
+    def get_counts(cls, field, counter, post_ids, archived=()):
+        """Значения счётчика для пачки постов: один запрос и один get_many.
+
+        archived — архивные посты из пачки: их значения уже лежат
+        в строке архива, и в PostCounter за ними не ходим.
+        """
+        post_ids = list(post_ids)
+        archived = {post.pk: getattr(post, field) for post in archived}
+        counts = dict(
+            cls.objects.filter(
+                post_id__in=[pk for pk in post_ids if pk not in archived]
+            ).values_list('post_id', field)
+        )
+        counts.update(archived)
+        pending = counter.get_pending(post_ids)
+        return {
+            post_id: counts.get(post_id, 0) + pending.get(post_id, 0)
+            for post_id in post_ids
+        }
+
+
+likes_counter = BufferedCounter(
+    'likes', lambda deltas: PostCounter.apply_deltas('likes', deltas),
+    threshold=settings.LIKE_COUNTER_FLUSH_THRESHOLD,
+    interval=settings.LIKE_COUNTER_FLUSH_INTERVAL
+)
+views_counter = BufferedCounter(
+    'views', lambda deltas: PostCounter.apply_deltas('views', deltas),
+    threshold=settings.VIEW_COUNTER_FLUSH_THRESHOLD,
+    interval=settings.VIEW_COUNTER_FLUSH_INTERVAL
+)
+
+
+class LikeManager(models.Manager):
+    def like(self, user, post):
+        """Ставит лайк; False, если он уже стоял."""
+        try:
+            with transaction.atomic():
+                self.create(user=user, post=post)
+        except IntegrityError:
+            return False
+        likes_counter.add(post.pk)
+        return True
+
+    def unlike(self, user, post):
+        """Снимает лайк; False, если его не было."""
+        deleted, _ = self.filter(user=user, post=post).delete()
+        if not deleted:
+            return False
+        likes_counter.add(post.pk, -1)
+        return True
+
+
+class Like(models.Model):
+    """Лайк пользователя; по одному на пост.
+
+    Таблица нужна только для уникальности и состояния кнопки,
+    а число лайков копится в likes_counter и хранится в PostCounter.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пост'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    objects = LikeManager()
+
+    class Meta:
+        verbose_name = 'Лайк'
+        verbose_name_plural = 'Лайки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_like'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.post_id}'
+
+
+NOTIFICATIONS_UNREAD_KEY = 'notifications_unread:{}'
+
+
+class NotificationManager(models.Manager):
+    def notify_followers(self, post, chunk_size):
+        """Создаёт уведомления подписчикам автора пачками по chunk_size.
+
+        Подписчики перебираются по курсору id, поэтому каждая пачка —
+        один запрос по индексу (author, id) и один INSERT OR IGNORE:
+        повторный запуск задачи не создаст дублей. Счётчики
+        непрочитанного здесь не трогаем: воркер работает в другом
+        процессе, и веб-процессы пересчитают их по истечении кэша.
+        """
+        follows = Follow.objects.filter(author_id=post.author_id)
+        cursor = 0
+        total = 0
+        while True:
+            chunk = list(
+                follows.filter(id__gt=cursor).order_by('id')
+                .values_list('id', 'user_id')[:chunk_size]
+            )
+            if not chunk:
+                return total
+            cursor = chunk[-1][0]
+            user_ids = [user_id for _, user_id in chunk]
+            self.bulk_create(
+                [self.model(user_id=user_id, post=post)
+                 for user_id in user_ids],
+                ignore_conflicts=True
+            )
+            total += len(user_ids)
+            if len(chunk) < chunk_size:
+                return total
+
+    def unread_count(self, user):
+        """Число непрочитанных уведомлений из кэша.
+
+        Кэш живёт settings.NOTIFICATIONS_UNREAD_TIMEOUT секунд, после
+        чего число пересчитывается по индексу (user, is_read).
+        """
+        key = NOTIFICATIONS_UNREAD_KEY.format(user.pk)
+        count = cache.get(key)
+        if count is None:
+            count = self.filter(user=user, is_read=False).count()
+            cache.set(key, count, settings.NOTIFICATIONS_UNREAD_TIMEOUT)
+        return count
+
+    def reset_unread(self, user_ids):
+        cache.delete_many(
+            [NOTIFICATIONS_UNREAD_KEY.format(pk) for pk in user_ids]
+        )
+
+    def mark_read(self, user):
+        self.filter(user=user, is_read=False).update(is_read=True)
+        cache.set(
+            NOTIFICATIONS_UNREAD_KEY.format(user.pk), 0,
+            settings.NOTIFICATIONS_UNREAD_TIMEOUT
+        )
+
+
+class Notification(models.Model):
+    """Уведомление подписчику о новом посте автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        blank=True,
+        null=True,
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        blank=True,
+        null=True,
+        verbose_name='Архивный пост',
+        help_text='Заполняется вместо post, когда пост уезжает в архив'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    objects = NotificationManager()
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = (
+            models.Index(fields=('user', 'id')),
+            models.Index(fields=('user', 'is_read')),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_notification'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user} <- {self.post_id or self.archived_post_id}'
+
+    @property
+    def target(self):
+        """Пост уведомления, живой или уже архивный."""
+        return self.post or self.archived_post
+
+
+class GroupStats(models.Model):
+    """Сводка по группе для каталога групп, включая архивные посты.
+
+    Новый пост обновляет строку инкрементально, а удаления и массовые
+    изменения пересчитывают её через refresh по индексу group_id.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    authors_count = models.PositiveIntegerField('Авторов', default=0)
+    last_post_at = models.DateTimeField(
+        'Последний пост', blank=True, null=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+        indexes = (
+            models.Index(fields=('-last_post_at',)),
+            models.Index(fields=('-posts_count',)),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.group}: {self.posts_count}, {self.authors_count}'
+
+    @classmethod
+    def add_post(cls, post):
+        """Учитывает новый пост: один UPDATE и проверка автора."""
+        posts = dict(group_id=post.group_id, author_id=post.author_id)
+        new_author = not (
+            Post.objects.filter(**posts).exclude(pk=post.pk).exists()
+            or ArchivedPost.objects.filter(**posts).exists()
+        )
+        cls.objects.bulk_create(
+            [cls(group_id=post.group_id)], ignore_conflicts=True
+        )
+        cls.objects.filter(group_id=post.group_id).update(
+            posts_count=models.F('posts_count') + 1,
+            authors_count=models.F('authors_count') + int(new_author),
+            last_post_at=post.pub_date,
+        )
+
+    @classmethod
+    def refresh(cls, group_ids):
+        """Пересчитывает статистику групп по постам и архиву."""
+        for group_id in set(group_ids) - {None}:
+            posts = Post.objects.filter(group_id=group_id).order_by()
+            archived = ArchivedPost.objects.filter(
+                group_id=group_id
+            ).order_by()
+            last_dates = [
+                queryset.aggregate(last=models.Max('pub_date'))['last']
+                for queryset in (posts, archived)
+            ]
+            cls.objects.filter(group_id=group_id).update(
+                posts_count=posts.count() + archived.count(),
+                authors_count=posts.values('author').union(
+                    archived.values('author')
+                ).count(),
+                last_post_at=max(filter(None, last_dates), default=None),
+            )
@@ -0,0 +1,164 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from core.pagecache import invalidate_pages
+from core.paginator import adjust_count, reset_counts
+from .feeds import invalidate_feeds
+from .models import (AUTHOR_SCOPE, GROUP_SCOPE, INDEX_SCOPE, Comment, Group,
+                     GroupActivity, GroupStats, PopularityScore, Post, User)
+
+# Посты изменены или удалены пачкой в обход пообъектных сигналов.
+# author_ids и group_ids — авторы и группы (до и после изменения),
+# чьи счётчики, ленты и страницы нужно сбросить.
+posts_bulk_changed = Signal(providing_args=('author_ids', 'group_ids'))
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_change():
+    """Отключает пообъектный сброс кэшей внутри блока.
+
+    Удаление через QuerySet.delete() всё равно отправляет post_delete
+    каждого объекта, но обработчики ниже его пропускают: после блока
+    вызывающий отправляет один posts_bulk_changed.
+    """
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = False
+
+
+def skip_in_bulk(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not getattr(_bulk, 'active', False):
+            handler(*args, **kwargs)
+    return wrapper
+
+
+def adjust_post_counts(post, delta):
+    adjust_count(INDEX_SCOPE, delta)
+    adjust_count(AUTHOR_SCOPE.format(post.author_id), delta)
+    if post.group_id:
+        adjust_count(GROUP_SCOPE.format(post.group_id), delta)
+
+
+@receiver(post_save, sender=Comment)
+def bump_popularity(sender, instance, created, **kwargs):
+    if created:
+        PopularityScore.bump(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def bump_group_activity(sender, instance, created, **kwargs):
+    if created and instance.group_id:
+        GroupActivity.bump(instance.group_id, instance.pub_date)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.bulk_create(
+            [GroupStats(group=instance)], ignore_conflicts=True
+        )
+
+
+@receiver(post_save, sender=Post)
+def add_to_group_stats(sender, instance, created, **kwargs):
+    if created and instance.group_id:
+        GroupStats.add_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+@skip_in_bulk
+def refresh_group_stats(sender, instance, **kwargs):
+    if instance.group_id:
+        GroupStats.refresh([instance.group_id])
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_group(sender, instance, **kwargs):
+    if instance.saved_group_id is DEFERRED and instance.pk:
+        instance.saved_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@skip_in_bulk
+def move_between_groups(sender, instance, created, **kwargs):
+    """Пост перенесён в другую группу: пересчитываем обе группы.
+
+    Ленту новой группы сбрасывает reset_feeds, старую — этот обработчик.
+    """
+    old_group_id = instance.saved_group_id
+    instance.saved_group_id = instance.group_id
+    if created or old_group_id in (DEFERRED, instance.group_id):
+        return
+    for group_id, delta in ((old_group_id, -1), (instance.group_id, 1)):
+        if group_id:
+            adjust_count(GROUP_SCOPE.format(group_id), delta)
+    GroupStats.refresh([old_group_id, instance.group_id])
+    invalidate_feeds(groups=Group.objects.filter(pk=old_group_id))
+
+
+@receiver(post_save, sender=Post)
+def count_created_post(sender, instance, created, **kwargs):
+    if created:
+        adjust_post_counts(instance, 1)
+
+
+@receiver(post_delete, sender=Post)
+@skip_in_bulk
+def count_deleted_post(sender, instance, **kwargs):
+    adjust_post_counts(instance, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@skip_in_bulk
+def reset_feeds(sender, instance, **kwargs):
+    invalidate_feeds(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@skip_in_bulk
+def reset_pages(sender, **kwargs):
+    invalidate_pages()
+
+
+@receiver(post_save, sender=Comment)
+@skip_in_bulk
+def reset_pages_on_commit(sender, **kwargs):
+    # post_save приходит до записи пути: сбрасываем страницы после
+    # фиксации, иначе их закэширует запрос, не видящий комментария.
+    transaction.on_commit(invalidate_pages)
+
+
+@receiver(posts_bulk_changed)
+def reset_after_bulk_change(sender, author_ids, group_ids, **kwargs):
+    """Один сброс кэшей и пересчёт групп вместо сигналов каждого поста."""
+    group_ids = set(group_ids) - {None}
+    reset_counts(
+        {INDEX_SCOPE}
+        | {AUTHOR_SCOPE.format(pk) for pk in author_ids}
+        | {GROUP_SCOPE.format(pk) for pk in group_ids}
+    )
+    invalidate_feeds(
+        authors=User.objects.filter(pk__in=author_ids).only('username'),
+        groups=Group.objects.filter(pk__in=group_ids).only('slug')
+    )
+    GroupStats.refresh(group_ids)
+    invalidate_pages()
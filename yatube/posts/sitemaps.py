@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import sitemap
+from django.db.models import Max
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_page
+
+from .models import Group, Post
+
+
+class PostShardSitemap(Sitemap):
+    """Посты с id из диапазона [shard * size, (shard + 1) * size).
+
+    Диапазон по первичному ключу выбирается по индексу без OFFSET,
+    а закрытые шарды почти не меняются и хорошо кэшируются.
+    """
+    changefreq = 'weekly'
+
+    def __init__(self, shard):
+        self.limit = settings.SITEMAP_SHARD_SIZE
+        self.start = shard * self.limit
+        self.stop = self.start + self.limit
+
+    def items(self):
+        return Post.objects.filter(
+            id__gte=self.start, id__lt=self.stop
+        ).only('id', 'pub_date').order_by('id')
+
+    def location(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def lastmod(self, item):
+        return item.pub_date
+
+
+class GroupSitemap(Sitemap):
+    changefreq = 'daily'
+
+    def items(self):
+        return Group.objects.only('slug').order_by('id')
+
+    def location(self, item):
+        return reverse('posts:group_list', args=(item.slug,))
+
+
+def sitemap_index(request):
+    max_id = Post.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    shards = max_id // settings.SITEMAP_SHARD_SIZE + 1
+    locations = [reverse('sitemap_groups')] + [
+        reverse('sitemap_posts', args=(shard,)) for shard in range(shards)
+    ]
+    return TemplateResponse(
+        request,
+        'sitemap_index.xml',
+        {'sitemaps': [request.build_absolute_uri(url) for url in locations]},
+        content_type='application/xml'
+    )
+
+
+@cache_page(settings.SITEMAP_CACHE_TIMEOUT)
+def posts_sitemap(request, shard):
+    return sitemap(request, {'posts': PostShardSitemap(shard)})
+
+
+@cache_page(settings.SITEMAP_CACHE_TIMEOUT)
+def groups_sitemap(request):
+    return sitemap(request, {'groups': GroupSitemap})
@@ -0,0 +1,24 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+from .models import Notification, Post
+
+
+@task
+def warm_thumbnails(post_id):
+    """Заранее создаёт миниатюру ленты, чтобы её не ждал первый читатель."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post and post.image:
+        # Те же параметры, что у {% prefetch_thumbnails %} в шаблонах ленты
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+
+@task
+def notify_followers(post_id):
+    """Рассылает уведомления о новом посте подписчикам автора."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post:
+        Notification.objects.notify_followers(
+            post, settings.NOTIFICATION_CHUNK_SIZE
+        )
@@ -0,0 +1,18 @@
+from django import template
+
+from ..models import PostCounter, likes_counter
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_likes(posts):
+    """Проставляет post.likes_count всем постам страницы разом."""
+    posts = list(posts)
+    counts = PostCounter.get_counts(
+        'likes', likes_counter, [post.pk for post in posts],
+        archived=[post for post in posts if post.is_archived]
+    )
+    for post in posts:
+        post.likes_count = counts[post.pk]
+    return ''
@@ -0,0 +1,10 @@
+from django import template
+
+from ..models import GroupActivity
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/trending_groups.html')
+def trending_groups(limit=5):
+    return {'trending': GroupActivity.trending()[:limit]}
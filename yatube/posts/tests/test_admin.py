@@ -0,0 +1,292 @@
+from unittest import mock
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.models import LogEntry
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import PAGINATOR_COUNT_KEY
+from ..admin import PostAdmin
+from ..models import (GROUP_SCOPE, ArchivedComment, ArchivedPost, Comment,
+                      Group, Post, User)
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        start = Post.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username=f'author{i}')
+            post = Post.objects.create(
+                text=f'Пост {i}', author=author, group=self.groups[0]
+            )
+            Comment.objects.create(post=post, author=author, text='Коммент')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelists_without_n_plus_one(self):
+        """Число запросов списка не зависит от числа строк."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment')
+        ]
+        self.create_posts(2)
+        few = [self.count_queries(url) for url in urls]
+        self.create_posts(10)
+        cache.clear()
+        self.assertEqual([self.count_queries(url) for url in urls], few)
+
+    def get_counts(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        return response, [
+            query['sql'] for query in queries if 'COUNT(' in query['sql']
+        ]
+
+    @mock.patch.object(PostAdmin, 'list_per_page', 2)
+    def test_changelist_count_is_cached(self):
+        """Повторный показ списка не выполняет COUNT(*)."""
+        self.create_posts(3)
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        response, counts = self.get_counts(url)
+        self.assertFalse(counts)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    @mock.patch.object(PostAdmin, 'list_per_page', 2)
+    def test_small_cached_count_is_recounted(self):
+        """Число не больше страницы не прячет пагинацию и «показать все»."""
+        self.create_posts(1)
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        self.create_posts(4)
+        response, counts = self.get_counts(url)
+        self.assertTrue(counts)
+        cl = response.context['cl']
+        self.assertEqual(cl.result_count, 5)
+        self.assertTrue(cl.multi_page)
+        self.assertFalse(cl.can_show_all)
+
+    @override_settings(ADMIN_SEARCH_COUNT_LIMIT=3)
+    @mock.patch.object(PostAdmin, 'list_per_page', 2)
+    def test_search_count_is_capped(self):
+        """Результаты поиска считаются не дальше ограничения."""
+        self.create_posts(5)
+        url = reverse('admin:posts_post_changelist')
+        response, counts = self.get_counts(url, {'q': 'Пост'})
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT 3', counts[0])
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_list_editable_updates_groups_in_bulk(self):
+        """Смена групп в списке — UPDATE на группу и один сброс кэша."""
+        self.create_posts(4)
+        posts = list(Post.objects.order_by('pk'))
+        cache.set(PAGINATOR_COUNT_KEY.format(
+            GROUP_SCOPE.format(self.groups[0].pk)), 4, None)
+        data = {
+            'form-TOTAL_FORMS': len(posts),
+            'form-INITIAL_FORMS': len(posts),
+            '_save': 'Сохранить',
+        }
+        for i, post in enumerate(posts):
+            data[f'form-{i}-id'] = post.pk
+            data[f'form-{i}-group'] = (
+                self.groups[1].pk if i < 3 else self.groups[0].pk
+            )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('admin:posts_post_changelist'), data
+            )
+        self.assertEqual(response.status_code, 302)
+        updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Post.objects.filter(group=self.groups[1]).count(), 3
+        )
+        self.assertEqual(LogEntry.objects.count(), 3)
+        self.assertIsNone(cache.get(PAGINATOR_COUNT_KEY.format(
+            GROUP_SCOPE.format(self.groups[0].pk))))
+
+    def test_list_editable_invalid_group_shows_errors(self):
+        """Несуществующая группа разбирается обычным formset."""
+        self.create_posts(1)
+        post = Post.objects.get()
+        response = self.client.post(reverse('admin:posts_post_changelist'), {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': post.pk,
+            'form-0-group': 999,
+            '_save': 'Сохранить',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['cl'].formset.errors[0])
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.groups[0])
+
+
+@override_settings(BULK_BATCH_SIZE=2)
+class BulkActionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.source = Group.objects.create(title='Откуда', slug='source')
+        cls.target = Group.objects.create(title='Куда', slug='target')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(
+                text=f'Спам {i}', author=self.spammer, group=self.source
+            ) for i in range(5)
+        ]
+        self.post = Post.objects.create(
+            text='Нормальный пост', author=self.author, group=self.source
+        )
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам'
+        )
+
+    def run_action(self, action, posts, model='post', **data):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'), {
+                'action': action,
+                ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+                'index': 0,
+                **data,
+            }
+        )
+
+    def apply_action(self, action, posts, model='post', **data):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'), {
+                'action': action,
+                ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+                'select_across': 0,
+                'apply': 'Выполнить',
+                **data,
+            }
+        )
+
+    def test_move_to_group_in_batches(self):
+        """Перенос в группу идёт пачками и сбрасывает кэши один раз."""
+        response = self.run_action('move_to_group', self.spam)
+        self.assertContains(response, 'name="group"')
+        self.assertFalse(self.target.posts.exists())
+
+        cache.set(PAGINATOR_COUNT_KEY.format(
+            GROUP_SCOPE.format(self.target.pk)), 0, None)
+        with mock.patch('posts.signals.invalidate_pages') as invalidate:
+            response = self.apply_action(
+                'move_to_group', self.spam, group=self.target.pk
+            )
+        self.assertEqual(response.status_code, 302)
+        invalidate.assert_called_once_with()
+        self.assertEqual(self.target.posts.count(), 5)
+        self.assertIsNone(cache.get(PAGINATOR_COUNT_KEY.format(
+            GROUP_SCOPE.format(self.target.pk))))
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Перенесено постов: 5, пачек: 3.', messages)
+
+    def test_delete_by_author(self):
+        """Удаляются все посты и комментарии авторов выбранных постов."""
+        response = self.run_action('delete_by_author', self.spam[:1])
+        self.assertContains(response, 'spammer')
+        self.assertEqual(Post.objects.count(), 6)
+
+        with mock.patch('posts.signals.invalidate_pages') as invalidate:
+            self.apply_action('delete_by_author', self.spam[:1])
+        invalidate.assert_called_once_with()
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_by_author_clears_archive(self):
+        """Вместе с постами удаляются архивные посты и комментарии."""
+        now = timezone.now()
+        archived = [
+            ArchivedPost.objects.create(
+                id=1000 + i, text='Старый', pub_date=now, author=author
+            ) for i, author in enumerate((self.spammer, self.author))
+        ]
+        ArchivedComment.objects.create(
+            id=1000, post=archived[1], author=self.spammer,
+            text='Старый спам', created=now
+        )
+        response = self.apply_action('delete_by_author', self.spam[:1])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(ArchivedPost.objects.all()), archived[1:])
+        self.assertFalse(ArchivedComment.objects.exists())
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn(
+            'Удалено постов: 6, комментариев: 2, пачек: 6.', messages
+        )
+
+    def test_delete_by_date_range(self):
+        """Удаляются только выбранные посты за указанный период."""
+        old = self.spam[0]
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timezone.timedelta(days=30)
+        )
+        today = timezone.localdate()
+        response = self.apply_action(
+            'delete_by_date_range', self.spam[:3],
+            since=today - timezone.timedelta(days=1), until=today
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertTrue(Post.objects.filter(pk=old.pk).exists())
+
+    def test_delete_by_date_range_validates_period(self):
+        """Перевёрнутый период возвращает форму с ошибкой."""
+        today = timezone.localdate()
+        response = self.apply_action(
+            'delete_by_date_range', self.spam,
+            since=today, until=today - timezone.timedelta(days=1)
+        )
+        self.assertContains(response, 'Начало периода позже его конца.')
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_comment_delete_by_author(self):
+        """Из списка комментариев удаляются все комментарии автора."""
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Нормальный'
+        )
+        spam = Comment.objects.filter(author=self.spammer)
+        self.apply_action('delete_by_author', spam, model='comment')
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['Нормальный']
+        )
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def make_post(self, name):
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+        path = post.image.path
+        os.utime(path, (0, 0))
+        return post, path
+
+    def test_gc_removes_orphans(self):
+        """Картинки удалённых постов и их миниатюры удаляются."""
+        live_post, live_path = self.make_post('live.gif')
+        orphan_post, orphan_path = self.make_post('orphan.gif')
+        orphan_file = ImageFile(orphan_post.image)
+        thumbnail_keys = default.kvstore._get(
+            orphan_file.key, identity='thumbnails'
+        )
+        thumbnail = default.kvstore._get(thumbnail_keys[0])
+        orphan_post.delete()
+
+        call_command('gc_media', '--dry-run', stdout=StringIO())
+        self.assertTrue(os.path.exists(orphan_path))
+
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(live_path))
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertFalse(thumbnail.exists())
+        self.assertIsNone(default.kvstore.get(orphan_file))
+        self.assertIsNotNone(default.kvstore.get(ImageFile(live_post.image)))
+
+    def test_gc_skips_fresh_files(self):
+        """Свежие файлы не трогаются: их пост может быть ещё не создан."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'fresh.gif')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as image:
+            image.write(SMALL_GIF)
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..feeds import invalidate_feeds
+from ..models import Group, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовая группа для теста'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост в ленте'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_available(self):
+        """Ленты RSS и Atom доступны для сайта, группы и автора."""
+        urls = [
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=('test_group',)),
+            reverse('posts:group_atom', args=('test_group',)),
+            reverse('posts:profile_rss', args=('author',)),
+            reverse('posts:profile_atom', args=('author',)),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('Пост в ленте', response.content.decode())
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы возвращает 404."""
+        response = self.client.get(
+            reverse('posts:group_rss', args=('unknown',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_conditional_get(self):
+        """Повторный запрос с ETag получает 304 без запросов к БД."""
+        url = reverse('posts:group_atom', args=('test_group',))
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_invalidated_on_new_post(self):
+        """Новый пост сбрасывает закэшированные ленты."""
+        url = reverse('posts:profile_rss', args=('author',))
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        self.assertIn('Свежий пост', self.client.get(url).content.decode())
+
+    def test_feed_of_old_group_invalidated_on_edit(self):
+        """Пост, перенесённый в другую группу, пропадает из ленты старой."""
+        other = Group.objects.create(title='Другая', slug='other_group')
+        url = reverse('posts:group_rss', args=('test_group',))
+        self.assertIn('Пост в ленте', self.client.get(url).content.decode())
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': self.post.text, 'group': other.pk}
+        )
+        self.assertNotIn(
+            'Пост в ленте', self.client.get(url).content.decode()
+        )
+
+    def test_invalidate_feeds_reads_scopes_in_bulk(self):
+        """Области лент пачки постов читаются запросом на модель."""
+        posts = list(Post.objects.all()) + [
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        posts = list(Post.objects.filter(pk__in=[p.pk for p in posts]))
+        with self.assertNumQueries(2):
+            invalidate_feeds(*posts)
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sitemap_index_lists_shards(self):
+        """Индекс карты сайта ссылается на шарды постов."""
+        response = self.client.get(reverse('sitemap'))
+        content = response.content.decode()
+        max_id = self.posts[-1].pk
+        self.assertIn(reverse('sitemap_groups'), content)
+        self.assertIn(reverse('sitemap_posts', args=(max_id // 2,)), content)
+        self.assertNotIn(
+            reverse('sitemap_posts', args=(max_id // 2 + 1,)), content
+        )
+
+    def test_sitemap_shard(self):
+        """Шард содержит только посты своего диапазона id."""
+        post = self.posts[0]
+        response = self.client.get(
+            reverse('sitemap_posts', args=(post.pk // 2,))
+        )
+        urls = response.context['urlset']
+        self.assertLessEqual(len(urls), 2)
+        self.assertIn(
+            reverse('posts:post_detail', args=(post.pk,)),
+            urls[0]['location']
+        )
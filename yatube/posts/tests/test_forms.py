@@ -6,9 +6,19 @@ from django.conf import settings
 from django.test import Client, override_settings, TestCase
 from django.urls import reverse
 
+from core.models import Task
 from ..models import Comment, Group, Post, User
+from ..tasks import warm_thumbnails
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -107,6 +117,9 @@ class PostCreateFormTests(TestCase):
                 image='posts/small.gif'
             ).exists()
         )
+        self.assertTrue(
+            Task.objects.filter(name=warm_thumbnails.task_name).exists()
+        )
 
     def test_pages_show_correct_context_with_image(self):
         """Шаблоны страниц сформированы с правильным контекстом."""
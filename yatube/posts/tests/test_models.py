@@ -1,6 +1,8 @@
-from django.test import TestCase
+from unittest import mock
 
-from ..models import Group, Post, User
+from django.test import TestCase, TransactionTestCase
+
+from ..models import Comment, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -55,3 +57,22 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CommentSaveTest(TransactionTestCase):
+    def test_pages_reset_after_path_is_written(self):
+        """Страницы сбрасываются, когда путь ответа уже записан в БД."""
+        user = User.objects.create_user(username='commenter')
+        post = Post.objects.create(author=user, text='Пост')
+        root = Comment.objects.create(post=post, author=user, text='Корень')
+        paths = []
+        with mock.patch('posts.signals.invalidate_pages') as invalidate:
+            invalidate.side_effect = lambda: paths.extend(
+                Comment.objects.values_list('path', flat=True)
+            )
+            reply = Comment.objects.create(
+                post=post, author=user, text='Ответ', parent=root
+            )
+        invalidate.assert_called_once_with()
+        self.assertEqual(sorted(paths), [root.path, reply.path])
+        self.assertTrue(reply.path.startswith(root.path))
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='spammer')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @override_settings(RATE_LIMITS={'post_create': {'user': (2, 60)}})
+    def test_post_create_rate_limited(self):
+        """Лишние посты отклоняются с кодом 429 и не попадают в БД."""
+        posts_count = Post.objects.count()
+        statuses = [
+            self.authorized_client.post(
+                reverse('posts:post_create'), {'text': f'Спам {i}'}
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [302, 302, 429])
+        self.assertEqual(Post.objects.count(), posts_count + 2)
+
+    @override_settings(RATE_LIMITS={'add_comment': {'ip': (1, 60)}})
+    def test_add_comment_rate_limited_by_ip(self):
+        """Лимит по IP действует для всех пользователей с этого адреса."""
+        other_client = Client()
+        other_client.force_login(User.objects.create_user(username='other'))
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        response = self.authorized_client.post(url, {'text': 'Первый'})
+        self.assertEqual(response.status_code, 302)
+        response = other_client.post(url, {'text': 'Второй'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_get_not_rate_limited(self):
+        """GET-запросы формы не расходуют лимит."""
+        with self.settings(RATE_LIMITS={'post_create': {'user': (1, 60)}}):
+            for _ in range(3):
+                response = self.authorized_client.get(
+                    reverse('posts:post_create')
+                )
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings, TestCase
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Post, User
+from ..thumbnails import prefetch_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PrefetchThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост с картинкой {i}',
+                image=SimpleUploadedFile(
+                    name=f'thumb{i}.gif', content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+        Post.objects.create(author=cls.user, text='Пост без картинки')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Кэш хранилища sorl переживает откат транзакции теста
+        cache.clear()
+
+    def test_prefetch_matches_thumbnail_tag(self):
+        """Миниатюры страницы совпадают с тегом thumbnail."""
+        posts = list(Post.objects.all())
+        prefetch_thumbnails(posts, '960x339', crop='center', upscale=True)
+        for post in posts:
+            if not post.image:
+                self.assertFalse(hasattr(post, 'thumbnail'))
+                continue
+            expected = get_thumbnail(
+                post.image, '960x339', crop='center', upscale=True
+            )
+            self.assertEqual(post.thumbnail.url, expected.url)
+
+    def test_prefetch_uses_single_query(self):
+        """Готовые миниатюры страницы достаются одним запросом."""
+        posts = list(Post.objects.all())
+        prefetch_thumbnails(posts, '960x339', crop='center', upscale=True)
+        cache.clear()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(
+                posts, '960x339', crop='center', upscale=True
+            )
+        with self.assertNumQueries(0):
+            prefetch_thumbnails(
+                posts, '960x339', crop='center', upscale=True
+            )
+        self.assertTrue(all(
+            post.thumbnail for post in posts if post.image
+        ))
@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from django.core.cache import cache
 from django.test import TestCase, Client
 
 from ..models import Follow, Post, Group, User
@@ -21,6 +22,7 @@ class PostURLTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
@@ -116,3 +118,46 @@ class PostURLTests(TestCase):
         self.assertFalse(
             Follow.objects.filter(user=self.user, author=self.user_author)
         )
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не создаёт дубликатов."""
+        for _ in range(2):
+            self.authorized_client.get(
+                f'/profile/{self.user_author.username}/follow/'
+            )
+        self.assertEqual(
+            Follow.objects.filter(
+                user=self.user, author=self.user_author
+            ).count(),
+            1
+        )
+
+    def test_self_follow(self):
+        """Нельзя подписаться на самого себя."""
+        self.author_of_post.get(
+            f'/profile/{self.user_author.username}/follow/'
+        )
+        self.assertFalse(Follow.objects.filter(user=self.user_author))
+
+    def test_follow_batch(self):
+        """Пакетная подписка и отписка от нескольких авторов."""
+        other = User.objects.create_user(username='other')
+        authors = [self.user_author.username, other.username]
+        response = self.authorized_client.post(
+            '/follow/batch/', {'action': 'follow', 'authors': authors}
+        )
+        self.assertRedirects(response, '/follow/')
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 2)
+
+        self.authorized_client.post(
+            '/follow/batch/', {'action': 'unfollow', 'authors': authors}
+        )
+        self.assertFalse(Follow.objects.filter(user=self.user))
+
+    def test_follow_batch_unknown_author(self):
+        """Пакетная подписка отклоняет несуществующих авторов."""
+        response = self.authorized_client.post(
+            '/follow/batch/', {'action': 'follow', 'authors': ['nobody']}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(Follow.objects.filter(user=self.user))
@@ -1,9 +1,22 @@
-from django.test import Client, TestCase
+from io import StringIO
+
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django import forms
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.fragments import render_fragment
+from core.paginator import PAGINATOR_COUNT_KEY
+from core.tasks import run_pending
 
-from ..models import Group, Post, User
+from ..models import (GROUP_SCOPE, ArchivedPost, Comment, Follow, Group,
+                      GroupActivity, GroupStats, Like, Notification,
+                      PopularityScore, Post, PostCounter, User, likes_counter,
+                      views_counter)
 
 
 class PostPagesTest(TestCase):
@@ -43,6 +56,7 @@ class PostPagesTest(TestCase):
         }
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
@@ -165,6 +179,28 @@ class PostPagesTest(TestCase):
                     len(response.context['page_obj']), count_of_posts
                 )
 
+    def test_paginator_counts_follow_posts(self):
+        """Число постов в кэше пагинатора меняется вместе с постами."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test_group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for page in pages:
+            self.author_of_post.get(page)
+        post = Post.objects.create(
+            text='Ещё пост', author=self.user_author, group=self.group
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.author_of_post.get(page)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, 14
+                )
+        post.delete()
+        response = self.author_of_post.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+
     def test_check_post_on_create(self):
         """Пост правильно добавляется на все страницы."""
         post = Post.objects.create(
@@ -226,3 +262,802 @@ class PostPagesTest(TestCase):
             reverse('posts:follow_index')
         )
         self.assertEqual(len(response.context.get('page_obj')), 0)
+
+
+class FollowListTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{i}')
+            for i in range(25)
+        ]
+        for follower in cls.followers:
+            Follow.objects.follow(follower, [cls.author])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_followers_keyset_pages(self):
+        """Подписчики выводятся постранично по курсору."""
+        response = self.guest_client.get(
+            reverse('posts:profile_followers', args=('author',))
+        )
+        first_page = response.context['users']
+        self.assertEqual(len(first_page), 20)
+        self.assertEqual(first_page[0], self.followers[-1])
+        self.assertEqual(response.context['follow_counts']['followers'], 25)
+
+        next_cursor = response.context['page'].next_cursor
+        response = self.guest_client.get(
+            reverse('posts:profile_followers', args=('author',)),
+            {'cursor': next_cursor}
+        )
+        self.assertEqual(len(response.context['users']), 5)
+        self.assertFalse(response.context['page'].has_next())
+
+    def test_following_api(self):
+        """API подписок отдаёт пользователей и счётчик."""
+        response = self.guest_client.get(
+            reverse('posts:api_profile_following', args=('follower0',))
+        )
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['username'], 'author')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_follow_counts_cached(self):
+        """Счётчики берутся из кэша и сбрасываются при подписке."""
+        self.assertEqual(Follow.objects.counts(self.author)['followers'], 25)
+        with self.assertNumQueries(0):
+            Follow.objects.counts(self.author)
+        Follow.objects.unfollow(self.followers[0], [self.author])
+        self.assertEqual(Follow.objects.counts(self.author)['followers'], 24)
+
+
+class ViewerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'writer{i}') for i in range(5)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Пост {author}')
+        Follow.objects.follow(cls.reader, cls.authors[:2])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_following_ids_cached(self):
+        """Подписки читаются одним запросом и сбрасываются при подписке."""
+        with self.assertNumQueries(1):
+            ids = Follow.objects.following_ids(self.reader)
+        self.assertEqual(ids, {author.pk for author in self.authors[:2]})
+        with self.assertNumQueries(0):
+            Follow.objects.following_ids(self.reader)
+        Follow.objects.follow(self.reader, self.authors[2:3])
+        self.assertIn(
+            self.authors[2].pk, Follow.objects.following_ids(self.reader)
+        )
+        Follow.objects.unfollow(self.reader, self.authors[:1])
+        self.assertNotIn(
+            self.authors[0].pk, Follow.objects.following_ids(self.reader)
+        )
+
+    def test_follow_buttons_share_one_query(self):
+        """Кнопки подписки у всех авторов страницы стоят один запрос."""
+        request = RequestFactory().get('/')
+        request.user = self.reader
+        with self.assertNumQueries(1):
+            buttons = [
+                render_fragment(request, 'follow_button', {
+                    'author_id': author.pk, 'username': author.username,
+                })
+                for author in self.authors
+            ]
+        self.assertEqual(
+            [('Отписаться' in button) for button in buttons],
+            [True, True, False, False, False]
+        )
+
+    def test_feed_cards_show_follow_state(self):
+        """В ленте у каждого автора своя кнопка, гостям их не видно."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Отписаться', count=2)
+        self.assertContains(response, 'Подписаться', count=3)
+        self.assertNotContains(
+            Client().get(reverse('posts:index')), 'Подписаться'
+        )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_feed_follow_buttons_without_page_cache(self):
+        """Без кэша страниц кнопки в ленте тоже свои у каждого."""
+        self.client.get(reverse('posts:index'))
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='stranger'))
+        response = stranger.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Отписаться')
+        self.assertContains(response, 'Подписаться', count=5)
+
+
+class PopularFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.quiet_post = Post.objects.create(author=cls.user, text='Тихий')
+        cls.hot_post = Post.objects.create(author=cls.user, text='Горячий')
+        cls.plain_post = Post.objects.create(author=cls.user, text='Без')
+        Comment.objects.create(
+            post=cls.quiet_post, author=cls.user, text='Один'
+        )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.hot_post, author=cls.user, text=f'Ещё {i}'
+            )
+
+    def test_comment_bumps_score(self):
+        """Каждый новый комментарий увеличивает рейтинг поста."""
+        self.assertEqual(self.hot_post.popularity.value, 3)
+        self.assertEqual(self.quiet_post.popularity.value, 1)
+
+    def test_popular_ordering(self):
+        """Популярная лента упорядочена по рейтингу."""
+        response = self.client.get(reverse('posts:popular_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.hot_post, self.quiet_post]
+        )
+
+    def test_decay_command(self):
+        """Команда затухания уменьшает рейтинги и удаляет малые."""
+        PopularityScore.objects.update(
+            decayed_at=timezone.now() - timezone.timedelta(hours=24)
+        )
+        call_command('decay_popularity', '--half-life=24', '--threshold=1',
+                     stdout=StringIO())
+        self.assertAlmostEqual(
+            PopularityScore.objects.get(post=self.hot_post).value, 1.5,
+            places=2
+        )
+        self.assertFalse(
+            PopularityScore.objects.filter(post=self.quiet_post).exists()
+        )
+
+
+class TrendingGroupsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.busy = Group.objects.create(
+            title='Шумная', slug='busy', description='Много постов'
+        )
+        cls.calm = Group.objects.create(
+            title='Тихая', slug='calm', description='Мало постов'
+        )
+        for i in range(3):
+            Post.objects.create(author=cls.user, group=cls.busy, text=f'{i}')
+        Post.objects.create(author=cls.user, group=cls.calm, text='Один')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_create_bumps_counter(self):
+        """Новый пост увеличивает счётчик текущего часа группы."""
+        activity = GroupActivity.objects.get(group=self.busy)
+        self.assertEqual(activity.posts_count, 3)
+        self.assertEqual(activity.bucket, GroupActivity.get_bucket())
+
+    def test_trending_groups_page(self):
+        """Страница трендов упорядочена по активности."""
+        response = self.client.get(reverse('posts:trending_groups'))
+        self.assertEqual(
+            response.context['trending'], [(self.busy, 3), (self.calm, 1)]
+        )
+
+    def test_trending_groups_cached(self):
+        """Топ групп читается из кэша без запросов к БД."""
+        GroupActivity.trending()
+        with self.assertNumQueries(0):
+            GroupActivity.trending()
+
+    def test_old_buckets_ignored_and_pruned(self):
+        """Старые счётчики не учитываются и удаляются командой."""
+        GroupActivity.objects.filter(group=self.busy).update(
+            bucket=timezone.now() - timezone.timedelta(days=2)
+        )
+        self.assertEqual(GroupActivity.trending(), [(self.calm, 1)])
+        call_command('prune_group_activity', stdout=StringIO())
+        self.assertFalse(GroupActivity.objects.filter(group=self.busy))
+
+
+class SharedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Кэшируемый')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный анонимный запрос не обращается к БД."""
+        url = reverse('posts:profile', args=('author',))
+        response = self.guest_client.get(url, {'page': 1})
+        self.assertIn('public', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = self.guest_client.get(url, {'page': 1})
+        self.assertEqual(cached.content, response.content)
+
+    def test_cache_invalidated_by_new_post(self):
+        """Новый пост сбрасывает кэш страниц."""
+        url = reverse('posts:profile', args=('author',))
+        self.guest_client.get(url)
+        Post.objects.create(author=self.user, text='Совсем новый')
+        response = self.guest_client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, 'Совсем новый')
+
+    def test_logged_in_user_reuses_shared_page(self):
+        """Авторизованный пользователь получает общую страницу из кэша
+           со своими шапкой и формой комментария."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        anonymous = self.guest_client.get(url)
+        self.assertNotContains(anonymous, 'Добавить комментарий')
+
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('post', response.context)
+        self.assertContains(response, 'Пользователь:')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(response, 'редактировать запись')
+        self.assertNotContains(response, '<!--fragment:')
+
+    def test_follow_button_per_user(self):
+        """Кнопка подписки на общей странице своя у каждого."""
+        url = reverse('posts:profile', args=('author',))
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.follow(reader, [self.user])
+        client = Client()
+        client.force_login(reader)
+        self.guest_client.get(url)
+        self.assertContains(client.get(url), 'Отписаться')
+        self.assertContains(self.guest_client.get(url), 'Подписаться')
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовая группа для теста'
+        )
+        old_date = timezone.now() - timezone.timedelta(days=400)
+        for i in range(8):
+            post = Post.objects.create(
+                text=f'Старый пост {i}', author=cls.user, group=cls.group
+            )
+            Post.objects.filter(pk=post.pk).update(pub_date=old_date)
+        cls.old_post = post
+        Comment.objects.create(
+            post=cls.old_post, author=cls.user, text='Старый комментарий'
+        )
+        for i in range(5):
+            Post.objects.create(
+                text=f'Новый пост {i}', author=cls.user, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def archive(self):
+        call_command('archive_posts', '--days', '365', '--batch-size', '3',
+                     stdout=StringIO())
+
+    def test_archive_moves_old_posts(self):
+        """Старые посты и их комментарии переезжают в архив пачками."""
+        self.archive()
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(ArchivedPost.objects.count(), 8)
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.comments.get().text, 'Старый комментарий')
+
+    def test_pages_fall_through_to_archive(self):
+        """Профиль и группа продолжают листаться в архив."""
+        pages = (
+            reverse('posts:profile', args=('author',)),
+            reverse('posts:group_list', args=('test_group',)),
+        )
+        for page in pages:
+            self.client.get(page)
+        self.archive()
+        for page in pages:
+            with self.subTest(page=page):
+                first = self.client.get(page).context['page_obj']
+                self.assertEqual(first.paginator.count, 13)
+                self.assertEqual(first[0].text, 'Новый пост 4')
+                second = self.client.get(page, {'page': 2})
+                posts = second.context['page_obj']
+                self.assertEqual(len(posts), 3)
+                self.assertTrue(all(post.is_archived for post in posts))
+
+    def test_author_post_counts_include_archive(self):
+        """Число постов автора учитывает архив и не считается заново."""
+        self.archive()
+        response = self.client.get(reverse('posts:profile', args=('author',)))
+        self.assertContains(response, 'Всего постов: 13')
+        url = reverse('posts:post_detail', args=(self.old_post.pk,))
+        response = self.client.get(url)
+        self.assertEqual(response.context['author_posts_count'], 13)
+        with self.settings(PAGE_CACHE_TIMEOUT=0), \
+                CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(
+            [query['sql'] for query in queries if 'COUNT(' in query['sql']]
+        )
+
+    def test_archive_keeps_group_stats(self):
+        """Архивные посты остаются в статистике группы."""
+        self.archive()
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (13, 1))
+
+    def test_archive_keeps_counters_and_notifications(self):
+        """Лайки, просмотры и уведомления архивного поста сохраняются."""
+        reader = User.objects.create_user(username='reader')
+        Like.objects.like(reader, self.old_post)
+        url = reverse('posts:post_detail', args=(self.old_post.pk,))
+        self.client.get(url)
+        likes_counter.flush()
+        views_counter.flush()
+        Notification.objects.create(user=reader, post=self.old_post)
+        self.archive()
+
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual((archived.likes, archived.views), (1, 1))
+        self.assertEqual(self.client.get(url).context['views'], 1)
+        self.assertEqual(
+            PostCounter.get_counts(
+                'likes', likes_counter, [archived.pk], archived=[archived]
+            ),
+            {archived.pk: 1}
+        )
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Старый пост 7')
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старой ссылке, без формы."""
+        self.archive()
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:post_detail', args=(self.old_post.pk,))
+        )
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(response, 'редактировать запись')
+        self.assertNotContains(response, 'Добавить комментарий')
+
+
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост с веткой', author=cls.user)
+        cls.other_post = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def reply(self, text, parent=None, post=None):
+        post = post or self.post
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            {'text': text, 'parent': parent.pk if parent else ''}
+        )
+        return Comment.objects.filter(text=text).first()
+
+    def test_reply_extends_parent_path(self):
+        """Ответ получает путь родителя со своим id в конце."""
+        root = self.reply('Корень')
+        child = self.reply('Ответ', root)
+        self.assertEqual(root.depth, 0)
+        self.assertEqual(child.parent, root)
+        self.assertEqual(child.depth, 1)
+        self.assertTrue(child.path.startswith(root.path))
+
+    def test_subtree_single_query(self):
+        """Ветка целиком достаётся одним запросом в порядке обхода."""
+        root = self.reply('Корень')
+        first = self.reply('Первый', root)
+        second = self.reply('Второй', root)
+        nested = self.reply('Вложенный', first)
+        self.reply('Чужой корень')
+        with self.assertNumQueries(1):
+            thread = list(root.get_subtree())
+        self.assertEqual(thread, [root, first, nested, second])
+
+    def test_parent_from_other_post_rejected(self):
+        """Нельзя ответить на комментарий к другому посту."""
+        foreign = self.reply('Чужой', post=self.other_post)
+        self.assertIsNone(self.reply('Ответ', foreign))
+
+    def test_thread_page(self):
+        """Страница ветки показывает ответы и форму ответа на корень."""
+        root = self.reply('Корень')
+        self.reply('Ответ в ветке', root)
+        response = self.client.get(
+            reverse('posts:comment_thread', args=(self.post.pk, root.pk))
+        )
+        self.assertContains(response, 'Ответ в ветке')
+        self.assertContains(response, f'value="{root.pk}"')
+
+
+class LikeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        # Таймер уже запущен: лайки копятся до явного сброса
+        cache.set(likes_counter.timer_key, True)
+
+    def test_like_once_per_user(self):
+        """Лайк ставится один раз, повторный POST его снимает."""
+        client = Client()
+        client.force_login(self.readers[0])
+        url = reverse('posts:post_like', args=(self.posts[0].pk,))
+        client.post(url)
+        self.assertTrue(Like.objects.filter(post=self.posts[0]).exists())
+        self.assertFalse(Like.objects.like(self.readers[0], self.posts[0]))
+        client.post(url)
+        self.assertFalse(Like.objects.filter(post=self.posts[0]).exists())
+
+    def test_counts_flushed_in_bulk(self):
+        """Лайки копятся в кэше и попадают в БД одним сбросом."""
+        for reader in self.readers:
+            for post in self.posts[:2]:
+                Like.objects.like(reader, post)
+        Like.objects.unlike(self.readers[0], self.posts[1])
+        self.assertFalse(PostCounter.objects.exists())
+
+        post_ids = [post.pk for post in self.posts]
+        expected = {post_ids[0]: 3, post_ids[1]: 2, post_ids[2]: 0}
+        with self.assertNumQueries(1):
+            counts = PostCounter.get_counts('likes', likes_counter, post_ids)
+        self.assertEqual(counts, expected)
+
+        call_command('flush_counters', stdout=StringIO())
+        self.assertEqual(
+            dict(PostCounter.objects.values_list('post', 'likes')),
+            {post_ids[0]: 3, post_ids[1]: 2}
+        )
+        self.assertEqual(likes_counter.get_pending(post_ids), {})
+        self.assertEqual(
+            PostCounter.get_counts('likes', likes_counter, post_ids),
+            expected
+        )
+
+    def test_flush_keeps_counts_of_deleted_posts_out(self):
+        """Дельты удалённых постов отбрасываются при сбросе."""
+        post = Post.objects.create(text='Удалю', author=self.user)
+        Like.objects.like(self.readers[0], post)
+        post_id = post.pk
+        post.delete()
+        self.assertEqual(likes_counter.flush(), {post_id: 1})
+        self.assertFalse(PostCounter.objects.exists())
+
+    def test_interval_flush(self):
+        """Лайки сбрасываются в БД самим процессом по истечении интервала."""
+        cache.delete(likes_counter.timer_key)
+        Like.objects.like(self.readers[0], self.posts[0])
+        self.assertEqual(self.posts[0].counter.likes, 1)
+
+    def test_log_records_post_once_per_window(self):
+        """Журнал растёт с числом постов, а не лайков."""
+        for reader in self.readers:
+            Like.objects.like(reader, self.posts[0])
+        self.assertEqual(cache.get(likes_counter.head_key), 1)
+        self.assertEqual(likes_counter.flush(), {self.posts[0].pk: 3})
+        Like.objects.unlike(self.readers[0], self.posts[0])
+        self.assertEqual(cache.get(likes_counter.head_key), 2)
+        self.assertEqual(likes_counter.flush(), {self.posts[0].pk: -1})
+        self.assertEqual(
+            PostCounter.objects.get(post=self.posts[0]).likes, 2
+        )
+
+    def test_archived_post_is_read_only(self):
+        """У архивного поста нет кнопки лайка, а POST ничего не меняет."""
+        post = Post.objects.create(text='Старый', author=self.user)
+        Like.objects.like(self.readers[0], post)
+        likes_counter.flush()
+        ArchivedPost.objects.archive([post])
+        client = Client()
+        client.force_login(self.readers[1])
+        detail = reverse('posts:post_detail', args=(post.pk,))
+        like = reverse('posts:post_like', args=(post.pk,))
+        response = client.get(detail)
+        self.assertNotContains(response, like)
+        self.assertContains(response, '♥ 1')
+        self.assertRedirects(client.post(like), detail)
+        self.assertEqual(ArchivedPost.objects.get(pk=post.pk).likes, 1)
+
+    def test_feed_shows_counts(self):
+        """Карточки ленты показывают число лайков."""
+        Like.objects.like(self.readers[0], self.posts[0])
+        response = Client().get(reverse('posts:profile', args=('author',)))
+        self.assertContains(response, '♥ 1')
+
+
+class ViewCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Читаемый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        # Таймер уже запущен: сбрасывать будет только порог
+        cache.set(views_counter.timer_key, True)
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def get_views(self):
+        return PostCounter.objects.filter(
+            post=self.post
+        ).values_list('views', flat=True).first()
+
+    def test_views_buffered_in_cache(self):
+        """Просмотры, в том числе из кэша страниц, копятся без записи в БД."""
+        for _ in range(3):
+            Client().get(self.url)
+        self.assertIsNone(self.get_views())
+        self.assertEqual(views_counter.get_pending([self.post.pk]),
+                         {self.post.pk: 3})
+        call_command('flush_counters', stdout=StringIO())
+        self.assertEqual(self.get_views(), 3)
+        # Другой query string — мимо закэшированной страницы
+        response = Client().get(self.url, {'v': 1})
+        self.assertContains(response, 'Просмотров: 3')
+
+    def test_threshold_flush(self):
+        """Набрав порог, счётчик сам сбрасывается в БД."""
+        views_counter.threshold, threshold = 5, views_counter.threshold
+        try:
+            for _ in range(7):
+                views_counter.add(self.post.pk)
+        finally:
+            views_counter.threshold = threshold
+        self.assertEqual(self.get_views(), 5)
+        self.assertEqual(views_counter.get_pending([self.post.pk]),
+                         {self.post.pk: 2})
+
+    def test_interval_flush(self):
+        """По истечении интервала первый же просмотр сбрасывает счётчик."""
+        views_counter.add(self.post.pk)
+        cache.delete(views_counter.timer_key)
+        views_counter.add(self.post.pk)
+        self.assertEqual(self.get_views(), 2)
+        self.assertEqual(views_counter.get_pending([self.post.pk]), {})
+
+    def test_archived_post_views_counted(self):
+        """Просмотры архивного поста сбрасываются в строку архива."""
+        ArchivedPost.objects.archive([self.post])
+        for _ in range(2):
+            Client().get(self.url)
+        call_command('flush_counters', stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.get(pk=self.post.pk).views, 2)
+        response = Client().get(self.url, {'v': 1})
+        self.assertContains(response, 'Просмотров: 2')
+
+    def test_missing_post_not_counted(self):
+        """Ответ 404 не считается просмотром."""
+        Client().get(reverse('posts:post_detail', args=(100500,)))
+        self.assertEqual(views_counter.get_pending([100500]), {})
+
+
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        for reader in cls.readers:
+            Follow.objects.follow(reader, [cls.author])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.readers[0])
+
+    def test_post_create_defers_fan_out(self):
+        """post_create только ставит задачу, уведомления создаёт воркер."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertFalse(Notification.objects.exists())
+        run_pending()
+        self.assertEqual(
+            set(Notification.objects.values_list('user', flat=True)),
+            {reader.pk for reader in self.readers}
+        )
+
+    def test_chunks_and_cached_unread_count(self):
+        """Уведомления вставляются пачками, счётчик читается из кэша."""
+        reader = self.readers[0]
+        post = Post.objects.create(text='Пост', author=self.author)
+        with self.assertNumQueries(6):
+            # Три пачки: выборка подписчиков и INSERT на каждую
+            self.assertEqual(
+                Notification.objects.notify_followers(post, chunk_size=2), 5
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(Notification.objects.unread_count(reader), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(Notification.objects.unread_count(reader), 1)
+
+    @override_settings(NOTIFICATIONS_UNREAD_TIMEOUT=0)
+    def test_unread_count_recomputed_after_timeout(self):
+        """Уведомления из воркера видны, когда кэш счётчика истёк."""
+        reader = self.readers[0]
+        self.assertEqual(Notification.objects.unread_count(reader), 0)
+        post = Post.objects.create(text='Пост', author=self.author)
+        Notification.objects.notify_followers(post, chunk_size=10)
+        self.assertEqual(Notification.objects.unread_count(reader), 1)
+
+    def test_repeated_fan_out_is_idempotent(self):
+        """Повторный запуск рассылки не создаёт дублей уведомлений."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        for _ in range(2):
+            Notification.objects.notify_followers(post, chunk_size=2)
+        self.assertEqual(Notification.objects.count(), len(self.readers))
+        self.assertEqual(
+            Notification.objects.unread_count(self.readers[0]), 1
+        )
+
+    def test_notifications_page(self):
+        """Страница показывает уведомления и сбрасывает непрочитанные."""
+        post = Post.objects.create(text='Свежий пост', author=self.author)
+        Notification.objects.notify_followers(post, chunk_size=10)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Свежий пост')
+        self.assertContains(response, 'list-group-item-info')
+        self.assertEqual(
+            Notification.objects.unread_count(self.readers[0]), 0
+        )
+        self.assertFalse(
+            Notification.objects.filter(
+                user=self.readers[0], is_read=False
+            ).exists()
+        )
+
+
+class GroupsIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.busy = Group.objects.create(title='Много постов', slug='busy')
+        cls.fresh = Group.objects.create(title='Свежая', slug='fresh')
+        cls.empty = Group.objects.create(title='Пустая', slug='empty')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        for i in range(3):
+            Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.busy
+            )
+        self.latest = Post.objects.create(
+            text='Последний', author=self.other, group=self.fresh
+        )
+
+    def get_stats(self, group):
+        stats = GroupStats.objects.get(group=group)
+        return stats.posts_count, stats.authors_count, stats.last_post_at
+
+    def test_new_posts_update_stats(self):
+        """Новый пост увеличивает счётчики без пересчёта."""
+        self.assertEqual(self.get_stats(self.busy)[:2], (3, 1))
+        post = Post.objects.create(
+            text='Ещё', author=self.other, group=self.busy
+        )
+        self.assertEqual(
+            self.get_stats(self.busy), (4, 2, post.pub_date)
+        )
+        self.assertEqual(self.get_stats(self.empty), (0, 0, None))
+
+    def test_delete_and_move_refresh_stats(self):
+        """Удаление и перенос поста пересчитывают затронутые группы."""
+        self.latest.delete()
+        self.assertEqual(self.get_stats(self.fresh), (0, 0, None))
+
+        post = self.busy.posts.first()
+        client = Client()
+        client.force_login(self.author)
+        client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': post.text, 'group': self.fresh.pk}
+        )
+        self.assertEqual(self.get_stats(self.busy)[:2], (2, 1))
+        self.assertEqual(self.get_stats(self.fresh)[:2], (1, 1))
+
+    def test_move_outside_views_refreshes_groups(self):
+        """Перенос из админки и через ORM обновляет обе группы."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        for group in (self.busy, self.fresh):
+            self.client.get(reverse('posts:group_list', args=(group.slug,)))
+        post = self.busy.posts.first()
+        self.client.force_login(admin)
+        self.client.post(
+            reverse('admin:posts_post_change', args=(post.pk,)),
+            {'text': post.text, 'author': self.author.pk,
+             'group': self.fresh.pk}
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).group, self.fresh)
+        self.assertEqual(self.get_stats(self.busy)[:2], (2, 1))
+        self.assertEqual(self.get_stats(self.fresh)[:2], (2, 2))
+        for group in (self.busy, self.fresh):
+            self.assertEqual(cache.get(PAGINATOR_COUNT_KEY.format(
+                GROUP_SCOPE.format(group.pk))), 2)
+
+        post = Post.objects.only('text').get(pk=self.latest.pk)
+        post.group = self.busy
+        post.save()
+        self.assertEqual(self.get_stats(self.busy)[:2], (3, 2))
+        self.assertEqual(self.get_stats(self.fresh)[:2], (1, 1))
+
+    def test_directory_sorting(self):
+        """Каталог сортируется по активности или по числу постов."""
+        url = reverse('posts:groups_index')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        groups = [stats.group for stats in response.context['page_obj']]
+        self.assertEqual(groups, [self.fresh, self.busy, self.empty])
+        self.assertContains(response, 'Записей: 3, авторов: 1')
+
+        response = self.client.get(url, {'sort': 'posts'})
+        groups = [stats.group for stats in response.context['page_obj']]
+        self.assertEqual(groups[0], self.busy)
+
+    def test_directory_pages_keep_sort(self):
+        """Ссылки пагинатора сохраняют выбранный порядок."""
+        for i in range(20):
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+        response = self.client.get(
+            reverse('posts:groups_index'), {'sort': 'posts'}
+        )
+        self.assertContains(response, '?sort=posts&amp;page=2')
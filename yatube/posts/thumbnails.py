@@ -0,0 +1,99 @@
+import logging
+
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+logger = logging.getLogger(__name__)
+
+
+class BatchThumbnailBackend(ThumbnailBackend):
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры без обращения к хранилищу ключей.
+
+        Повторяет подготовку опций из ThumbnailBackend.get_thumbnail,
+        чтобы имя файла, а значит и ключ, совпадали с тегом thumbnail.
+        """
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+backend = BatchThumbnailBackend()
+
+
+def _get_many_raw(keys):
+    """Достаёт значения ключей одним get_many из кэша и одним запросом к БД."""
+    cache = default.kvstore.cache
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStore.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        cache.set_many(found, settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        key: value for key, value in values.items()
+        if value is not None and value != EMPTY_VALUE
+    }
+
+
+def _get_thumbnail_files(posts, geometry_string, **options):
+    """Ключи хранилища и файлы миниатюр для постов с картинками."""
+    files = {}
+    for post in posts:
+        try:
+            thumbnail = backend.get_thumbnail_file(
+                post.image, geometry_string, **options
+            )
+        except Exception as error:
+            logger.warning('Не удалось получить миниатюру: %s', error)
+            continue
+        files[add_prefix(thumbnail.key)] = (post, thumbnail)
+    return files
+
+
+def prefetch_thumbnails(posts, geometry_string, **options):
+    """Проставляет post.thumbnail для всех постов страницы разом.
+
+    Вместо отдельного обращения к хранилищу sorl на каждый тег
+    {% thumbnail %} ключи всех миниатюр страницы запрашиваются вместе.
+    Миниатюры, которых ещё нет, создаются обычным способом.
+    """
+    posts = [post for post in posts if post.image]
+    for post in posts:
+        post.thumbnail = None
+    files = _get_thumbnail_files(posts, geometry_string, **options)
+    if not files:
+        return
+
+    cached = {}
+    if isinstance(default.kvstore, CachedDBStore):
+        cached = _get_many_raw(list(files))
+
+    for raw_key, (post, thumbnail) in files.items():
+        if raw_key in cached:
+            post.thumbnail = deserialize_image_file(cached[raw_key])
+            continue
+        try:
+            post.thumbnail = default.backend.get_thumbnail(
+                post.image, geometry_string, **options
+            )
+        except Exception as error:
+            logger.warning('Не удалось создать миниатюру: %s', error)
@@ -1,20 +1,91 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('groups/', views.groups_index, name='groups_index'),
+    path('groups/trending/', views.trending_groups, name='trending_groups'),
     path('', views.index, name='index'),
+    path(
+        'rss/',
+        feeds.cached_feed(feeds.LatestPostsFeed(), 'index', 'rss'),
+        name='index_rss'
+    ),
+    path(
+        'atom/',
+        feeds.cached_feed(feeds.LatestPostsAtomFeed(), 'index', 'atom'),
+        name='index_atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.cached_feed(feeds.GroupPostsFeed(), 'group:{slug}', 'rss'),
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.cached_feed(
+            feeds.GroupPostsAtomFeed(), 'group:{slug}', 'atom'
+        ),
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.cached_feed(
+            feeds.AuthorPostsFeed(), 'author:{username}', 'rss'
+        ),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.cached_feed(
+            feeds.AuthorPostsAtomFeed(), 'author:{username}', 'atom'
+        ),
+        name='profile_atom'
+    ),
+    path('popular/', views.popular_index, name='popular_index'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
+    path(
+        'api/profile/<str:username>/followers/',
+        views.api_profile_followers,
+        name='api_profile_followers'
+    ),
+    path(
+        'api/profile/<str:username>/following/',
+        views.api_profile_following,
+        name='api_profile_following'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('notifications/', views.notifications, name='notifications'),
+    path(
+        'follow/batch/',
+        views.profile_follow_batch,
+        name='profile_follow_batch'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -0,0 +1,33 @@
+from django.utils.functional import cached_property
+
+from .models import Follow
+
+
+class Viewer:
+    """Связи текущего пользователя с авторами на странице.
+
+    Подписки читаются один раз на запрос из общего кэша, поэтому
+    кнопки подписки у любого числа авторов не добавляют запросов.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def following_ids(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return Follow.objects.following_ids(self.user)
+
+    def is_self(self, author_id):
+        return self.user.pk == author_id
+
+    def follows(self, author_id):
+        return author_id in self.following_ids
+
+
+def get_viewer(request):
+    """Viewer запроса; создаётся при первом обращении."""
+    if not hasattr(request, '_viewer'):
+        request._viewer = Viewer(request.user)
+    return request._viewer
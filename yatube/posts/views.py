@@ -1,13 +1,42 @@
 from django.shortcuts import get_object_or_404, redirect, render
 from django.core.paginator import Paginator
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_POST
+
+from core.counters import count_hits
+from core.pagecache import cache_shared_page
+from core.paginator import (CachedCountPaginator, ChainedQuerySets,
+                            KeysetPage, get_keyset_page)
+from core.ratelimit import rate_limit
+from .models import (AUTHOR_SCOPE, GROUP_SCOPE, INDEX_SCOPE, ArchivedComment,
+                     ArchivedPost, Comment, Follow, Group, GroupActivity,
+                     GroupStats, Like, Notification, Post, PostCounter, User,
+                     views_counter)
+from .forms import CommentForm, FollowBatchForm, PostForm
+from .tasks import notify_followers, warm_thumbnails
+
+
+@cache_shared_page
+def index(request):
+    posts = Post.objects.all()
+    paginator = CachedCountPaginator(posts, 10, INDEX_SCOPE)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
 
-from .models import Follow, Group, Post, User
-from .forms import CommentForm, PostForm
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/index.html', context)
 
 
-def index(request):
-    posts = Post.objects.all()
+def popular_index(request):
+    posts = Post.objects.filter(
+        popularity__isnull=False
+    ).select_related('author', 'group').order_by(
+        '-popularity__value', '-popularity__post'
+    )
     paginator = Paginator(posts, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -15,13 +44,14 @@ def index(request):
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return render(request, 'posts/popular.html', context)
 
 
+@cache_shared_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
+    posts = ChainedQuerySets(group.posts.all(), group.archived_posts.all())
+    paginator = CachedCountPaginator(posts, 10, GROUP_SCOPE.format(group.pk))
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -31,41 +61,89 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+# Порядок каталога групп: по последнему посту или по числу постов
+GROUP_SORTS = {
+    'activity': ('-last_post_at', '-group'),
+    'posts': ('-posts_count', '-group'),
+}
+GROUPS_PAGE_SIZE = 20
+
+
+@cache_shared_page
+def groups_index(request):
+    sort = request.GET.get('sort')
+    if sort not in GROUP_SORTS:
+        sort = 'activity'
+    stats = GroupStats.objects.select_related('group').order_by(
+        *GROUP_SORTS[sort]
+    )
+    paginator = Paginator(stats, GROUPS_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+        'sort': sort,
+        'page_params': f'sort={sort}&',
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+def trending_groups(request):
+    context = {
+        'trending': GroupActivity.trending(),
+        'window': settings.TRENDING_GROUPS_WINDOW,
+    }
+    return render(request, 'posts/trending_groups.html', context)
+
+
+def _get_author_paginator(author_id):
+    """Свежие и архивные посты автора с закэшированным числом."""
+    posts = ChainedQuerySets(
+        Post.objects.filter(author_id=author_id),
+        ArchivedPost.objects.filter(author_id=author_id)
+    )
+    return CachedCountPaginator(posts, 10, AUTHOR_SCOPE.format(author_id))
+
+
+@cache_shared_page
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, 10)
+    paginator = _get_author_paginator(author.pk)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    following = request.user.is_authenticated and (
-        Follow.objects.filter(user=request.user, author=author)
-    )
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'follow_counts': Follow.objects.counts(author),
     }
 
     return render(request, 'posts/profile.html', context)
 
 
+@count_hits(views_counter, 'post_id')
+@cache_shared_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-
-    form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        post = get_object_or_404(ArchivedPost, id=post_id)
+    comments = post.comments.select_related('author').order_by('path')
+    views = PostCounter.get_counts(
+        'views', views_counter, [post.pk],
+        archived=[post] if post.is_archived else ()
+    )
 
     context = {
         'post': post,
-        'form': form,
-        'comments': comments
+        'comments': comments,
+        'views': views[post.pk],
+        'author_posts_count': _get_author_paginator(post.author_id).count,
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@rate_limit('post_create')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -78,6 +156,9 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        warm_thumbnails.delay(post.pk)
+    notify_followers.delay(post.pk)
     return redirect('posts:profile', post.author.username)
 
 
@@ -106,17 +187,67 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limit('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
+    parent_id = request.POST.get('parent')
+    parent = None
+    if parent_id:
+        if not parent_id.isdigit():
+            return HttpResponseBadRequest()
+        # Отвечать можно только на комментарии этого же поста
+        parent = get_object_or_404(post.comments, pk=parent_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = parent
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@require_POST
+def post_like(request, post_id):
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        # Архивный пост только для чтения: лайки у него не меняются
+        get_object_or_404(ArchivedPost, id=post_id)
+        return redirect('posts:post_detail', post_id=post_id)
+    if not Like.objects.like(request.user, post):
+        Like.objects.unlike(request.user, post)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+COMMENT_THREAD_SIZE = 50
+
+
+def comment_thread(request, post_id, comment_id):
+    """Ветка ответов на комментарий, постранично по курсору пути."""
+    root = Comment.objects.filter(post_id=post_id, pk=comment_id).first()
+    if root is None:
+        root = get_object_or_404(
+            ArchivedComment, post_id=post_id, pk=comment_id
+        )
+    comments = root.get_subtree().select_related('author')
+    after = request.GET.get('after')
+    if after:
+        comments = comments.filter(path__gt=after)
+    comments = list(comments[:COMMENT_THREAD_SIZE + 1])
+    next_cursor = None
+    if len(comments) > COMMENT_THREAD_SIZE:
+        comments = comments[:COMMENT_THREAD_SIZE]
+        next_cursor = comments[-1].path
+    context = {
+        'post': root.post,
+        'root': root,
+        'comments': comments,
+        'page': KeysetPage(comments, next_cursor),
+    }
+    return render(request, 'posts/comment_thread.html', context)
+
+
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
@@ -130,25 +261,109 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+NOTIFICATIONS_PAGE_SIZE = 20
+
+
+@login_required
+def notifications(request):
+    page = get_keyset_page(
+        Notification.objects.filter(user=request.user)
+        .select_related('post__author', 'archived_post__author'),
+        request.GET.get('cursor'),
+        NOTIFICATIONS_PAGE_SIZE
+    )
+    # Страница уже выбрана, так что новые уведомления на ней видны
+    Notification.objects.mark_read(request.user)
+    return render(request, 'posts/notifications.html', {'page': page})
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-
-        if not Follow.objects.filter(user=request.user,
-                                     author=author).exists():
-            Follow.objects.create(
-                user=request.user,
-                author=author
-            )
+    Follow.objects.follow(request.user, [author])
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.filter(
-            user=request.user, author=author
-        ).delete()
+    Follow.objects.unfollow(request.user, [author])
     return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_follow_batch(request):
+    form = FollowBatchForm(request.POST)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    authors = form.cleaned_data['authors']
+    if form.cleaned_data['action'] == FollowBatchForm.FOLLOW:
+        Follow.objects.follow(request.user, authors)
+    else:
+        Follow.objects.unfollow(request.user, authors)
+    return redirect('posts:follow_index')
+
+
+FOLLOW_LIST_SIZE = 20
+
+
+def _get_follow_list(request, username, relation):
+    """Страница подписчиков (followers) или подписок (following) автора."""
+    author = get_object_or_404(User, username=username)
+    if relation == 'followers':
+        follows = Follow.objects.filter(author=author).select_related('user')
+    else:
+        follows = Follow.objects.filter(user=author).select_related('author')
+    page = get_keyset_page(
+        follows, request.GET.get('cursor'), FOLLOW_LIST_SIZE
+    )
+    users = [
+        follow.user if relation == 'followers' else follow.author
+        for follow in page
+    ]
+    return author, page, users
+
+
+def _render_follow_list(request, username, relation):
+    author, page, users = _get_follow_list(request, username, relation)
+    context = {
+        'author': author,
+        'relation': relation,
+        'page': page,
+        'users': users,
+        'follow_counts': Follow.objects.counts(author),
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def _follow_list_json(request, username, relation):
+    author, page, users = _get_follow_list(request, username, relation)
+    return JsonResponse({
+        'count': Follow.objects.counts(author)[relation],
+        'next_cursor': page.next_cursor,
+        'results': [
+            {
+                'username': user.username,
+                'full_name': user.get_full_name(),
+            }
+            for user in users
+        ],
+    })
+
+
+def profile_followers(request, username):
+    return _render_follow_list(request, username, 'followers')
+
+
+def profile_following(request, username):
+    return _render_follow_list(request, username, 'following')
+
+
+def api_profile_followers(request, username):
+    return _follow_list_json(request, username, 'followers')
+
+
+def api_profile_following(request, username):
+    return _follow_list_json(request, username, 'following')
@@ -0,0 +1,69 @@
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+
+from .models import AccountDeletion, User
+from .tasks import schedule_account_deletion
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    """Удаление пользователя блокирует его и ставит задачу в очередь.
+
+    Страница подтверждения не собирает все связанные объекты,
+    а данные удаляет фоновая задача delete_account пачками.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [f'{obj}: аккаунт будет заблокирован, данные удалятся в фоне'
+             for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        schedule_account_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_account_deletion(user)
+
+    def response_delete(self, request, obj_display, obj_id):
+        self.message_user(
+            request, f'Аккаунт «{obj_display}» заблокирован, '
+            'его данные удаляются в фоне.'
+        )
+        return HttpResponseRedirect(
+            reverse('admin:users_accountdeletion_changelist')
+        )
+
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'username',
+        'status',
+        'step',
+        'follows',
+        'likes',
+        'notifications',
+        'comments',
+        'posts',
+        'media',
+        'created',
+        'finished_at',
+    )
+    search_fields = ('username',)
+    list_filter = ('status',)
+    readonly_fields = list_display[1:] + ('user', 'last_error')
+    empty_value_display = '-пусто-'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='Имя пользователя')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено')], default='queued', max_length=10, verbose_name='Статус')),
+                ('step', models.CharField(blank=True, max_length=20, verbose_name='Текущий шаг')),
+                ('follows', models.PositiveIntegerField(default=0, verbose_name='Подписок удалено')),
+                ('likes', models.PositiveIntegerField(default=0, verbose_name='Лайков удалено')),
+                ('notifications', models.PositiveIntegerField(default=0, verbose_name='Уведомлений удалено')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментариев удалено')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Постов удалено')),
+                ('media', models.PositiveIntegerField(default=0, verbose_name='Картинок удалено')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Начато')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Удаление аккаунта',
+                'verbose_name_plural': 'Удаления аккаунтов',
+            },
+        ),
+    ]
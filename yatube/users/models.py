@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import F
+
+User = get_user_model()
+
+
+class AccountDeletionManager(models.Manager):
+    def start(self, user):
+        """Блокирует пользователя и заводит запись об удалении.
+
+        Возвращает запись и True, если удаление только что начато.
+        """
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        return self.get_or_create(
+            user=user, defaults={'username': user.username}
+        )
+
+    def advance(self, pk, field, count):
+        """Прибавляет удалённые объекты к прогрессу одним UPDATE."""
+        self.filter(pk=pk).update(**{field: F(field) + count})
+
+
+class AccountDeletion(models.Model):
+    """Удаление аккаунта, которое идёт пачками в фоновой задаче."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+    )
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='deletion',
+        verbose_name='Пользователь'
+    )
+    username = models.CharField('Имя пользователя', max_length=150)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    step = models.CharField('Текущий шаг', max_length=20, blank=True)
+    follows = models.PositiveIntegerField('Подписок удалено', default=0)
+    likes = models.PositiveIntegerField('Лайков удалено', default=0)
+    notifications = models.PositiveIntegerField(
+        'Уведомлений удалено', default=0
+    )
+    comments = models.PositiveIntegerField('Комментариев удалено', default=0)
+    posts = models.PositiveIntegerField('Постов удалено', default=0)
+    media = models.PositiveIntegerField('Картинок удалено', default=0)
+    created = models.DateTimeField('Начато', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    objects = AccountDeletionManager()
+
+    class Meta:
+        verbose_name = 'Удаление аккаунта'
+        verbose_name_plural = 'Удаления аккаунтов'
+
+    def __str__(self) -> str:
+        return f'{self.username} ({self.get_status_display()})'
@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from core.tasks import task
+from posts.bulk import change_posts, run_in_batches
+from posts.models import (FOLLOW_COUNTS_KEY, FOLLOWING_IDS_KEY,
+                          ArchivedComment, ArchivedPost, Comment, Follow,
+                          Like, Notification, Post, PostCounter)
+from .models import AccountDeletion, User
+
+
+def delete_batch(batch):
+    """Удаляет пачку; возвращает число удалённых объектов её модели."""
+    _, deleted = batch.delete()
+    return deleted.get(batch.model._meta.label, 0)
+
+
+def delete_follows(batch):
+    users, followers = set(), set()
+    for user_id, author_id in batch.values_list('user_id', 'author_id'):
+        users.update((user_id, author_id))
+        followers.add(user_id)
+    count = delete_batch(batch)
+    cache.delete_many(
+        [FOLLOW_COUNTS_KEY.format(pk) for pk in users]
+        + [FOLLOWING_IDS_KEY.format(pk) for pk in followers]
+    )
+    return count
+
+
+def delete_likes(batch):
+    # Буфер likes_counter живёт в кэше веб-процессов, поэтому лайки
+    # вычитаются прямо в БД в транзакции пачки
+    post_ids = list(batch.values_list('post_id', flat=True))
+    count = delete_batch(batch)
+    PostCounter.apply_deltas('likes', {post_id: -1 for post_id in post_ids})
+    return count
+
+
+def get_steps(user):
+    """Шаги до удаления постов: поле прогресса, выборка и функция пачки.
+
+    Посты удаляются последними, а строка пользователя — после них:
+    к этому моменту у неё не остаётся связанных строк, которые
+    Django пришлось бы собирать каскадом в одной транзакции.
+    """
+    return (
+        ('follows', Follow.objects.filter(Q(user=user) | Q(author=user)),
+         delete_follows),
+        ('likes', Like.objects.filter(user=user), delete_likes),
+        ('notifications', Notification.objects.filter(user=user),
+         delete_batch),
+        ('comments', Comment.objects.filter(author=user), delete_batch),
+        ('comments', ArchivedComment.objects.filter(author=user),
+         delete_batch),
+    )
+
+
+def run_step(deletion, field, queryset, delete):
+    def apply(batch):
+        AccountDeletion.objects.advance(deletion.pk, field, delete(batch))
+
+    AccountDeletion.objects.filter(pk=deletion.pk).update(step=field)
+    run_in_batches(queryset, apply, settings.ACCOUNT_DELETION_BATCH_SIZE)
+
+
+def get_unread_readers(batch):
+    """Получатели непрочитанных уведомлений о постах пачки."""
+    field = 'archived_post' if batch.model is ArchivedPost else 'post'
+    return set(
+        Notification.objects.filter(is_read=False, **{f'{field}__in': batch})
+        .values_list('user_id', flat=True)
+    )
+
+
+def delete_posts(deletion, queryset):
+    """Удаляет посты пачками, а их картинки — после фиксации пачки.
+
+    Уведомления о постах удаляются каскадом, поэтому счётчики
+    непрочитанного их получателей сбрасываются и пересчитаются.
+    """
+    def apply(batch):
+        images = [name for name in batch.values_list('image', flat=True)
+                  if name]
+        readers = get_unread_readers(batch)
+        AccountDeletion.objects.advance(
+            deletion.pk, 'posts', delete_batch(batch)
+        )
+        transaction.on_commit(lambda: delete_media(deletion, images))
+        transaction.on_commit(
+            lambda: Notification.objects.reset_unread(readers)
+        )
+
+    change_posts(
+        queryset, apply, size=settings.ACCOUNT_DELETION_BATCH_SIZE
+    )
+
+
+def delete_media(deletion, images):
+    for name in images:
+        # Вместе с файлом удаляются миниатюры и записи sorl-thumbnail
+        delete_image(name)
+    AccountDeletion.objects.advance(deletion.pk, 'media', len(images))
+
+
+@task
+def delete_account(deletion_id):
+    """Удаляет данные заблокированного пользователя пачками.
+
+    Каждая пачка — своя короткая транзакция, прогресс пишется
+    в AccountDeletion в той же транзакции. Упавшая задача
+    повторяется и продолжает с того, что ещё не удалено.
+    """
+    deletion = AccountDeletion.objects.select_related('user').get(
+        pk=deletion_id
+    )
+    user = deletion.user
+    if user is None:
+        return
+    AccountDeletion.objects.filter(pk=deletion.pk).update(
+        status=AccountDeletion.RUNNING
+    )
+    try:
+        for field, queryset, delete in get_steps(user):
+            run_step(deletion, field, queryset, delete)
+        AccountDeletion.objects.filter(pk=deletion.pk).update(step='posts')
+        delete_posts(deletion, Post.objects.filter(author=user))
+        delete_posts(deletion, ArchivedPost.objects.filter(author=user))
+        with transaction.atomic():
+            User.objects.filter(pk=user.pk).delete()
+            AccountDeletion.objects.filter(pk=deletion.pk).update(
+                status=AccountDeletion.DONE, step='',
+                finished_at=timezone.now()
+            )
+    except Exception as error:
+        AccountDeletion.objects.filter(pk=deletion.pk).update(
+            last_error=repr(error)
+        )
+        raise
+
+
+def schedule_account_deletion(user):
+    """Блокирует пользователя сразу и ставит удаление его данных в очередь."""
+    with transaction.atomic():
+        deletion, created = AccountDeletion.objects.start(user)
+        if created:
+            delete_account.delay(deletion.pk)
+    return deletion
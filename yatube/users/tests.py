@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+from posts.models import (Comment, Follow, Like, Notification, Post,
+                          PostCounter, likes_counter)
+from .models import AccountDeletion, User
+from .tasks import schedule_account_deletion
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(ACCOUNT_DELETION_BATCH_SIZE=2)
+class AccountDeletionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='heavy')
+        self.other = User.objects.create_user(username='other')
+        self.other_post = Post.objects.create(
+            text='Чужой пост', author=self.other
+        )
+        for i in range(5):
+            post = Post.objects.create(text=f'Пост {i}', author=self.user)
+            Comment.objects.create(
+                post=self.other_post, author=self.user, text=f'Коммент {i}'
+            )
+            Comment.objects.create(post=post, author=self.other, text='Ответ')
+        Follow.objects.follow(self.user, [self.other])
+        Follow.objects.follow(self.other, [self.user])
+        Like.objects.like(self.user, self.other_post)
+
+    def test_admin_delete_only_blocks_user(self):
+        """Удаление из админки блокирует аккаунт и ставит задачу."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:auth_user_delete', args=(self.user.pk,)),
+            {'post': 'yes'}
+        )
+        self.assertRedirects(
+            response, reverse('admin:users_accountdeletion_changelist')
+        )
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.posts.count(), 5)
+        self.assertTrue(Task.objects.filter(
+            name='users.tasks.delete_account', status=Task.QUEUED
+        ).exists())
+
+    def test_background_job_deletes_everything(self):
+        """Задача удаляет данные пачками и записывает прогресс."""
+        Follow.objects.counts(self.other)
+        deletion = schedule_account_deletion(self.user)
+        schedule_account_deletion(self.user)
+        self.assertEqual(Task.objects.count(), 1)
+
+        run_pending()
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, AccountDeletion.DONE)
+        self.assertIsNone(deletion.user)
+        self.assertEqual(deletion.username, 'heavy')
+        self.assertEqual(
+            (deletion.follows, deletion.likes, deletion.comments,
+             deletion.posts),
+            (2, 1, 5, 5)
+        )
+        self.assertFalse(User.objects.filter(username='heavy').exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            Follow.objects.counts(self.other),
+            {'followers': 0, 'following': 0}
+        )
+
+    def test_likes_subtracted_in_database(self):
+        """Лайки удалённого пользователя вычитаются прямо в PostCounter."""
+        likes_counter.flush()
+        pk = self.other_post.pk
+        self.assertEqual(PostCounter.objects.get(post_id=pk).likes, 1)
+        schedule_account_deletion(self.user)
+        run_pending()
+        self.assertEqual(PostCounter.objects.get(post_id=pk).likes, 0)
+        self.assertEqual(likes_counter.get_pending([pk]), {})
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class AccountMediaDeletionTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_images_deleted_after_commit(self):
+        """Картинки удаляются после того, как удалены посты."""
+        cache.clear()
+        user = User.objects.create_user(username='painter')
+        post = Post.objects.create(
+            text='С картинкой', author=user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+        path = post.image.path
+        self.assertTrue(os.path.exists(path))
+
+        deletion = schedule_account_deletion(user)
+        run_pending()
+        deletion.refresh_from_db()
+        self.assertEqual((deletion.posts, deletion.media), (1, 1))
+        self.assertFalse(os.path.exists(path))
+
+
+class AccountNotificationsTest(TransactionTestCase):
+    def test_unread_counts_reset_for_readers(self):
+        """Уведомления о постах удалённого автора пропадают из счётчика."""
+        cache.clear()
+        author = User.objects.create_user(username='leaving')
+        reader = User.objects.create_user(username='reader')
+        post = Post.objects.create(text='Пост', author=author)
+        Notification.objects.create(user=reader, post=post)
+        self.assertEqual(Notification.objects.unread_count(reader), 1)
+
+        schedule_account_deletion(author)
+        run_pending()
+        self.assertEqual(Notification.objects.unread_count(reader), 0)
@@ -23,9 +23,89 @@ ALLOWED_HOSTS = [
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # По умолчанию 300 ключей: буферы счётчиков вытесняли бы
+        # страницы, счётчики подписок и служебные ключи друг друга
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+# Лимиты на запись: (ёмкость ведра, за сколько секунд оно наполняется)
+# Вёдра хранятся в кэше: с LocMemCache лимит действует на каждый процесс
+RATE_LIMITS = {
+    'post_create': {
+        'user': (5, 60),
+        'ip': (20, 60),
+    },
+    'add_comment': {
+        'user': (10, 60),
+        'ip': (40, 60),
+    },
+}
+
+# Популярные посты: период полураспада рейтинга в часах и порог удаления
+POPULARITY_HALF_LIFE = 24
+POPULARITY_MIN_SCORE = 0.05
+
+# Популярные группы: окно в часах, размер топа и время жизни кэша
+TRENDING_GROUPS_WINDOW = 24
+TRENDING_GROUPS_SIZE = 10
+TRENDING_GROUPS_CACHE_TIMEOUT = 300
+
+# Карта сайта делится на шарды по диапазонам id постов
+SITEMAP_SHARD_SIZE = 10000
+SITEMAP_CACHE_TIMEOUT = 60 * 60
+# Ленты сбрасываются сигналами, но массовые изменения из воркера
+# (удаление аккаунта) сбрасывают только его кэш: держим ленты недолго
+FEED_CACHE_TIMEOUT = 60
+
+# Сколько секунд хранить страницы для анонимных посетителей (0 — не хранить)
+PAGE_CACHE_TIMEOUT = 60
+
+# Число объектов для пагинатора: через сколько секунд пересчитывать в фоне,
+# сколько хранить устаревшее значение и сколько страниц показывать максимум
+PAGINATOR_COUNT_TIMEOUT = 60
+PAGINATOR_COUNT_STALE_TIMEOUT = 60 * 60 * 24
+PAGINATOR_MAX_PAGES = 1000
+# Результаты поиска в админке считаются не дальше этого числа строк
+ADMIN_SEARCH_COUNT_LIMIT = 1000
+
+# Посты старше стольких дней переносятся в архив пачками по ARCHIVE_BATCH_SIZE
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+# Просмотры постов сбрасываются в БД, когда накопилось столько просмотров
+# или прошло столько секунд с прошлого сброса
+VIEW_COUNTER_FLUSH_THRESHOLD = 1000
+VIEW_COUNTER_FLUSH_INTERVAL = 60
+# То же для лайков: кэш у каждого процесса свой, и без сброса по времени
+# накопленные в нём лайки пропали бы при перезапуске
+LIKE_COUNTER_FLUSH_THRESHOLD = 100
+LIKE_COUNTER_FLUSH_INTERVAL = 60
+
+# Фоновые задачи: число попыток, пауза перед повтором в секундах (удваивается
+# с каждой попыткой), через сколько секунд считать задачу зависшей,
+# размер пула и пауза опроса пустой очереди для run_workers
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 10
+TASK_LOCK_TIMEOUT = 10 * 60
+TASK_WORKERS = 4
+TASK_POLL_INTERVAL = 1
+
+# Уведомления о новых постах создаются пачками по столько подписчиков
+NOTIFICATION_CHUNK_SIZE = 500
+# Сколько секунд хранить счётчики и список подписок пользователя: подписки
+# меняют и фоновые задачи, чьи сбросы кэша веб-процессам не видны
+FOLLOW_CACHE_TIMEOUT = 60
+# Столько секунд число непрочитанных берётся из кэша, потом пересчитывается
+# по БД: уведомления создаёт воркер, а его кэш веб-процессам не виден
+NOTIFICATIONS_UNREAD_TIMEOUT = 30
+
+# Массовые действия админки изменяют и удаляют объекты пачками по столько
+BULK_BATCH_SIZE = 500
+
+# Данные удаляемого аккаунта удаляются короткими транзакциями по стольку строк
+ACCOUNT_DELETION_BATCH_SIZE = 100
+
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -37,10 +117,13 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.sitemaps',
     'django.contrib.staticfiles',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.HtmlMinifyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +136,10 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic добавляет в имена файлов хеш содержимого и кладёт рядом
+# .gz/.br копии: такие файлы можно кэшировать в браузере бессрочно
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -96,7 +183,14 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в таблицу OutboxMessage, а фоновая задача
+# deliver_outbox отправляет их через OUTBOX_EMAIL_BACKEND пачками
+# по OUTBOX_BATCH_SIZE; неудачные повторяются с удвоением паузы
+EMAIL_BACKEND = 'core.mail.OutboxEmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 60
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 
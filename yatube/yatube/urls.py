@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from posts import sitemaps
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.server_error'
@@ -12,6 +14,17 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-groups.xml',
+        sitemaps.groups_sitemap,
+        name='sitemap_groups'
+    ),
+    path(
+        'sitemap-posts-<int:shard>.xml',
+        sitemaps.posts_sitemap,
+        name='sitemap_posts'
+    ),
     path('', include('posts.urls', namespace='posts')),
 ]
 